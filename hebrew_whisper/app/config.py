@@ -5,6 +5,45 @@ class Config:
     BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))  # Set to root folder "hebrew_whisper"
     UPLOAD_FOLDER = os.path.join(BASE_DIR, 'data/uploads')
     TRANSCRIPT_FOLDER = os.path.join(BASE_DIR, 'data/transcripts')
+    TRANSCRIPT_DB = os.path.join(TRANSCRIPT_FOLDER, 'transcripts.sqlite3')  # Indexed, compressed transcript store
     FEEDBACK_FOLDER = os.path.join(BASE_DIR, 'data/feedback')
     TRAINING_DATA_FOLDER = os.path.join(BASE_DIR, 'data/training_data')
     PERFECT_TRAINING_FOLDER = os.path.join(BASE_DIR, 'data/training_data/perfect_training')
+
+    # Shared model pool
+    MODEL_NAME = os.getenv('MODEL_NAME', 'medium')
+    # Models clients may request by name: Whisper variants or fine-tuned checkpoint paths, comma-separated
+    ALLOWED_MODELS = tuple(name.strip() for name in os.getenv('ALLOWED_MODELS', MODEL_NAME).split(',') if name.strip())
+    MODEL_POOL_CONCURRENCY = int(os.getenv('MODEL_POOL_CONCURRENCY', 1))  # Concurrent inferences per loaded model
+    MODEL_POOL_WORKERS = int(os.getenv('MODEL_POOL_WORKERS', 4))  # Threads preparing and scheduling pool jobs
+    STUB_MODEL = os.getenv('STUB_MODEL', 'false').lower() == 'true'  # Serve a weightless stub model for load tests
+
+    # Parallel decoding of long files across worker processes (0 or 1 disables it)
+    PARALLEL_DECODE_WORKERS = int(os.getenv('PARALLEL_DECODE_WORKERS', 0))
+    PARALLEL_DECODE_MIN_SECONDS = int(os.getenv('PARALLEL_DECODE_MIN_SECONDS', 120))  # Shorter files decode in-process
+
+    # Model memory management (0 disables a limit)
+    MEMORY_BUDGET_MB = int(os.getenv('MEMORY_BUDGET_MB', 0))  # Process RSS budget
+    DEVICE_MEMORY_BUDGET_MB = int(os.getenv('DEVICE_MEMORY_BUDGET_MB', 0))  # CUDA memory budget
+    MODEL_IDLE_UNLOAD_SECONDS = int(os.getenv('MODEL_IDLE_UNLOAD_SECONDS', 900))
+    MEMORY_REAPER_INTERVAL_SECONDS = int(os.getenv('MEMORY_REAPER_INTERVAL_SECONDS', 60))
+
+    # Audio preprocessing
+    SPECTRAL_GATE_ENABLED = os.getenv('SPECTRAL_GATE_ENABLED', 'false').lower() == 'true'  # Spectral-gating denoiser
+
+    # Batch transcription
+    BATCH_MAX_FILES = int(os.getenv('BATCH_MAX_FILES', 100))
+    BATCH_MAX_FILE_BYTES = int(os.getenv('BATCH_MAX_FILE_BYTES', 200 * 1024 * 1024))  # Per file or zip member, uncompressed
+    BATCH_MAX_BYTES = int(os.getenv('BATCH_MAX_BYTES', 1024 * 1024 * 1024))  # Whole batch, uncompressed
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 1024 * 1024 * 1024))  # Request body limit enforced by Flask
+    AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac', '.ogg', '.m4a', '.mp4', '.webm', '.aac', '.opus')
+
+    # Inference placement: 'inline' runs models in the web process, 'queue' hands every request to worker.py
+    INFERENCE_MODE = os.getenv('INFERENCE_MODE', 'inline')
+    JOB_QUEUE_URL = os.getenv('JOB_QUEUE_URL', f"sqlite:///{os.path.join(BASE_DIR, 'data/jobs.sqlite3')}")
+    JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 120))  # Renewed by the worker while a job runs
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+    JOB_POLL_INTERVAL_SECONDS = float(os.getenv('JOB_POLL_INTERVAL_SECONDS', 0.5))
+    JOB_EVENT_RETENTION_SECONDS = int(os.getenv('JOB_EVENT_RETENTION_SECONDS', 86400))
+    JOB_RESULT_TIMEOUT_SECONDS = int(os.getenv('JOB_RESULT_TIMEOUT_SECONDS', 600))  # How long a REST request waits
+    WORKER_CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', 1))
@@ -1,7 +1,13 @@
+from flask import request
 from flask_socketio import SocketIO, emit
-from models.whisper_model import WhisperModelSingleton
+from models.model_pool import WhisperModelPool
+from services.job_queue import get_job_queue
 from utilities.file_handler import FileHandler
-import torch
+from utilities.native_threads import NativeThreadRunner
+import os
+import socket
+import time
+import uuid
 
 
 class SocketHandler:
@@ -16,7 +22,19 @@ class SocketHandler:
         """
         self.socketio = socketio
         self.app = app
+        self.queued = app.config.get('INFERENCE_MODE', 'inline') == 'queue'
+        if self.queued:
+            # Jobs run on worker.py processes; this process only relays their events
+            self.job_queue = get_job_queue(app.config['JOB_QUEUE_URL'])
+            self.origin = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            self.pool = None
+        else:
+            self.pool = WhisperModelPool.from_config(app.config)
         self._register_events()
+        if self.queued:
+            self.socketio.start_background_task(self._relay_job_events)
+        else:
+            self.socketio.start_background_task(self._memory_reaper)
 
     def _register_events(self):
         """Register WebSocket event handlers."""
@@ -34,8 +52,17 @@ class SocketHandler:
                 return
 
             try:
-                whisper_model = WhisperModelSingleton.get_instance()
-                transcription = whisper_model.transcribe(file_path, language)
+                model_name = WhisperModelPool.resolve_model_name(self.app.config, data.get('model'))
+            except ValueError as e:
+                emit('error', {'error': str(e)})
+                return
+
+            if self.queued:
+                self._enqueue_transcription(file_path, language, model_name)
+                return
+
+            try:
+                transcription = self.pool.transcribe(file_path, language, model_name)
 
                 # Emit progress updates (mocked here for demonstration)
                 for i in range(1, 101, 10):
@@ -47,6 +74,45 @@ class SocketHandler:
             except Exception as e:
                 emit('error', {'error': str(e)})
 
+    def _enqueue_transcription(self, file_path, language, model_name):
+        """Queue a transcription for the workers on behalf of the current session."""
+        payload = {
+            'file_path': file_path,
+            'language': language,
+            'model_name': model_name,
+        }
+        try:
+            job_id = NativeThreadRunner.run(
+                self.job_queue.enqueue, payload, self.origin, request.sid,
+                self.app.config.get('JOB_MAX_ATTEMPTS', 3)
+            )
+            emit('log_message', {'message': f"Transcription job {job_id} queued.", 'job_id': job_id})
+        except Exception as e:
+            emit('error', {'error': f"Failed to queue transcription: {e}"})
+
+    def _relay_job_events(self):
+        """Forward progress and results of this process's queued jobs to their sessions, purging old ones hourly."""
+        interval = self.app.config.get('JOB_POLL_INTERVAL_SECONDS', 0.5)
+        retention = self.app.config.get('JOB_EVENT_RETENTION_SECONDS', 86400)
+        batch_size = 100
+        last_id, last_purge = 0, time.monotonic()
+        while True:
+            events = []
+            try:
+                # SQLite may wait on locks; keep that wait off the eventlet hub
+                events = NativeThreadRunner.run(self.job_queue.poll_events, self.origin, last_id, batch_size)
+                for event in events:
+                    if event['sid']:
+                        self.socketio.emit(event['event'], event['data'], to=event['sid'])
+                    last_id = event['id']
+                if time.monotonic() - last_purge > 3600:
+                    NativeThreadRunner.run(self.job_queue.purge_events, retention)
+                    last_purge = time.monotonic()
+            except Exception as e:
+                self.app.logger.error(f"Error relaying job events: {e}", exc_info=True)
+            # Keep draining without a pause while full batches come back
+            self.socketio.sleep(0 if len(events) == batch_size else interval)
+
     def handle_background_task(self):
         """Start the background task via WebSocket."""
         self.socketio.start_background_task(self._background_task, self.app.app_context())
@@ -61,15 +127,26 @@ class SocketHandler:
                 return
 
             emit('log_message', {'message': f"Processing {len(audio_files)} new audio files."})
-            whisper_model = WhisperModelSingleton.get_instance(model_name="medium")  # Load model on-demand
+            model_name = self.app.config.get('MODEL_NAME', 'medium')
 
             for audio_file in audio_files:
-                audio_path = uploads_dir / audio_file
+                audio_path = os.path.join(uploads_dir, audio_file)
                 try:
-                    transcription = whisper_model.transcribe(audio_path, "he")
+                    transcription = self.pool.transcribe(audio_path, "he", model_name)
                     emit('log_message', {'message': f"Transcription complete for file: {audio_file}"})
                     FileHandler.delete_file(audio_path)
                 except Exception as e:
                     emit('error', {'error': f"Error processing {audio_file}: {e}"})
-            whisper_model.clean_up()  # Clear memory
-            torch.cuda.empty_cache()  # Free GPU memory
+            # Models stay loaded; the memory manager unloads them once idle or over budget
+
+    def _memory_reaper(self):
+        """Periodically unload models that have been idle for too long."""
+        interval = self.app.config.get('MEMORY_REAPER_INTERVAL_SECONDS', 60)
+        if not interval or not self.pool.memory.idle_seconds:
+            return
+        while True:
+            self.socketio.sleep(interval)
+            try:
+                self.pool.memory.unload_idle()
+            except Exception as e:
+                self.app.logger.error(f"Error unloading idle models: {e}", exc_info=True)
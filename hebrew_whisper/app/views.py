@@ -1,7 +1,13 @@
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, Response, request, jsonify, send_file, current_app, stream_with_context
+import io
 import os
-import torch
-from models.whisper_model import WhisperModel
+import socket
+import uuid
+from models.model_pool import WhisperModelPool
+from services.batch_transcription_service import BatchTranscriptionService
+from services.job_queue import get_job_queue, wait_for_jobs
+from utilities.native_threads import NativeThreadRunner
+from utilities.transcript_store import TranscriptStore
 
 # Define the Blueprint with a URL prefix
 main_blueprint = Blueprint('main', __name__, url_prefix='/api')
@@ -10,41 +16,100 @@ main_blueprint = Blueprint('main', __name__, url_prefix='/api')
 class TranscriptionService:
     """Service class to handle audio file transcription and related tasks."""
 
-    def __init__(self, uploads_dir='./uploads', transcript_dir='./transcripts', model_name='medium'):
+    def __init__(self, uploads_dir='./uploads', transcript_dir='./transcripts', model_name='medium', pool=None,
+                 store=None, job_queue=None, job_options=None):
         self.uploads_dir = uploads_dir
         self.transcript_dir = transcript_dir
         self.model_name = model_name
+        # With a job queue, inference runs on worker.py processes instead of this one
+        self.job_queue = job_queue
+        self.job_options = job_options or {}
 
         # Ensure directories exist
         os.makedirs(self.uploads_dir, exist_ok=True)
         os.makedirs(self.transcript_dir, exist_ok=True)
 
-        # Initialize the Whisper model
-        self.whisper_model = WhisperModel(model_name=self.model_name)
+        # Borrow models from the shared pool instead of loading one per request
+        self.pool = pool or (None if job_queue else WhisperModelPool.get_instance())
+        self.store = store or TranscriptStore.get_instance(os.path.join(self.transcript_dir, 'transcripts.sqlite3'))
 
     def save_uploaded_file(self, file):
-        """Save the uploaded file to the uploads directory."""
-        file_path = os.path.join(self.uploads_dir, file.filename)
+        """Save the uploaded file to the uploads directory under a unique name."""
+        file_path = os.path.join(self.uploads_dir, f"{uuid.uuid4().hex}_{os.path.basename(file.filename)}")
         try:
             file.save(file_path)
             return file_path
         except Exception as e:
             raise RuntimeError(f"Failed to save file: {e}")
 
-    def transcribe(self, file_path, language):
-        """Transcribe the audio file using the Whisper model."""
+    def transcribe(self, file_path, language, filename=None):
+        """
+        Transcribe the audio file, reusing a stored transcript of the same audio when one exists.
+
+        Returns:
+            dict: The stored transcript record.
+        """
         try:
-            return self.whisper_model.transcribe(file_path, language)
+            # Hashing and SQLite calls block; run them on native threads, off the eventlet hub
+            audio_hash = NativeThreadRunner.run(self.store.hash_audio, file_path)
+            cached = NativeThreadRunner.run(self.store.find_by_audio, audio_hash, language, self.model_name)
+            if cached:
+                return cached
+
+            if self.job_queue is not None:
+                return self._transcribe_queued(file_path, language, filename)
+
+            result = self.pool.transcribe_result(file_path, language, self.model_name)
+            timing = {"transcribe_seconds": result['inference_seconds']}
+            job_id = NativeThreadRunner.run(
+                self.store.put, audio_hash, result['text'], segments=result['segments'], timing=timing,
+                filename=filename, language=language, model_name=self.model_name
+            )
+            return NativeThreadRunner.run(self.store.get, job_id)
         except Exception as e:
             raise RuntimeError(f"Error during transcription: {e}")
 
-    def save_transcription(self, filename, transcription):
-        """Save the transcription to a text file."""
-        base_filename = os.path.splitext(filename)[0]
-        transcript_filepath = os.path.join(self.transcript_dir, f"{base_filename}_transcription.txt")
-        with open(transcript_filepath, 'w', encoding='utf-8') as f:
-            f.write(transcription)
-        return transcript_filepath
+    def _transcribe_queued(self, file_path, language, filename=None):
+        """Hand the file to the inference workers and wait for the stored transcript."""
+        payload = {'file_path': os.path.abspath(file_path), 'language': language,
+                   'model_name': self.model_name, 'filename': filename}
+        origin = f"rest-{socket.gethostname()}-{os.getpid()}"
+        job_id = NativeThreadRunner.run(self.job_queue.enqueue, payload, origin, None,
+                                        self.job_options.get('max_attempts', 3))
+        try:
+            job = next(wait_for_jobs(self.job_queue, [job_id], self.job_options.get('poll_interval', 0.5),
+                                     self.job_options.get('timeout')))
+        except TimeoutError:
+            NativeThreadRunner.run(self.job_queue.cancel, job_id)
+            raise
+        if job['status'] != 'done':
+            raise RuntimeError(job.get('error') or f"Transcription job {job_id} was {job['status']}.")
+        return NativeThreadRunner.run(self.store.get, job['result']['transcript_id'])
+
+    @staticmethod
+    def transcript_download_name(filename):
+        """Name offered to the client for a transcript download."""
+        return f"{os.path.splitext(os.path.basename(filename or 'audio'))[0]}_transcription.txt"
+
+
+def inference_backend(config):
+    """
+    Where REST requests run inference: the shared model pool, or with INFERENCE_MODE=queue
+    the job queue served by worker.py processes.
+
+    Returns:
+        dict: Keyword arguments for `TranscriptionService` and `BatchTranscriptionService`.
+    """
+    if config.get('INFERENCE_MODE', 'inline') != 'queue':
+        return {'pool': WhisperModelPool.from_config(config)}
+    return {
+        'job_queue': get_job_queue(config['JOB_QUEUE_URL']),
+        'job_options': {
+            'max_attempts': config.get('JOB_MAX_ATTEMPTS', 3),
+            'poll_interval': config.get('JOB_POLL_INTERVAL_SECONDS', 0.5),
+            'timeout': config.get('JOB_RESULT_TIMEOUT_SECONDS', 600),
+        },
+    }
 
 
 @main_blueprint.route('/transcribe', methods=['POST'])
@@ -60,21 +125,35 @@ def transcribe_audio():
         # Retrieve language from the request or use the default
         language = request.form.get('language', 'he')
 
+        try:
+            model_name = WhisperModelPool.resolve_model_name(current_app.config, request.form.get('model'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         # Initialize the transcription service
         transcription_service = TranscriptionService(
             uploads_dir=current_app.config.get('UPLOAD_FOLDER', './uploads'),
-            transcript_dir=current_app.config.get('TRANSCRIPT_FOLDER', './transcripts')
+            transcript_dir=current_app.config.get('TRANSCRIPT_FOLDER', './transcripts'),
+            model_name=model_name,
+            store=TranscriptStore.from_config(current_app.config),
+            **inference_backend(current_app.config)
         )
 
         # Save the uploaded file
         file_path = transcription_service.save_uploaded_file(file)
 
-        # Transcribe the audio file
-        transcription = transcription_service.transcribe(file_path, language)
+        # Transcribe the audio file and store the result
+        record = transcription_service.transcribe(file_path, language, filename=file.filename)
 
-        # Save and return the transcription
-        transcript_filepath = transcription_service.save_transcription(file.filename, transcription)
-        return send_file(transcript_filepath, as_attachment=True, download_name=os.path.basename(transcript_filepath))
+        # Serve the transcript straight from memory
+        response = send_file(
+            io.BytesIO(record['text'].encode('utf-8')),
+            mimetype='text/plain; charset=utf-8',
+            as_attachment=True,
+            download_name=transcription_service.transcript_download_name(file.filename)
+        )
+        response.headers['X-Job-Id'] = record['job_id']
+        return response
 
     except Exception as e:
         current_app.logger.error(f"An error occurred: {str(e)}", exc_info=True)
@@ -83,7 +162,79 @@ def transcribe_audio():
         # Ensure the uploaded file is removed after processing
         if file_path and os.path.exists(file_path):
             os.remove(file_path)
-        torch.cuda.empty_cache()  # Clear GPU memory
+
+
+@main_blueprint.route('/transcribe/batch', methods=['POST'])
+def transcribe_batch():
+    """
+    API endpoint to transcribe many files in one request.
+
+    Accepts any number of `files` (or `file`) parts, each an audio file or a zip archive
+    of audio files, and streams back one NDJSON line per file in completion order.
+    """
+    files = request.files.getlist('files') + request.files.getlist('file')
+    if not files:
+        return jsonify({"error": "No files uploaded"}), 400
+
+    language = request.form.get('language', 'he')
+    config = current_app.config
+    try:
+        model_name = WhisperModelPool.resolve_model_name(config, request.form.get('model'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    batch_service = BatchTranscriptionService(
+        store=TranscriptStore.from_config(config),
+        **inference_backend(config),
+        uploads_dir=config.get('UPLOAD_FOLDER', './uploads'),
+        audio_extensions=config.get('AUDIO_EXTENSIONS', ('.wav',)),
+        max_files=config.get('BATCH_MAX_FILES', 100),
+        max_file_bytes=config.get('BATCH_MAX_FILE_BYTES', 200 * 1024 * 1024),
+        max_batch_bytes=config.get('BATCH_MAX_BYTES', 1024 * 1024 * 1024),
+        model_name=model_name
+    )
+
+    try:
+        staged = batch_service.stage_uploads(files)
+    except ValueError as e:
+        batch_service.clean_up()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        batch_service.clean_up()
+        current_app.logger.error(f"Failed to stage batch upload: {str(e)}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+    if not staged:
+        batch_service.clean_up()
+        return jsonify({"error": "No audio files found in upload"}), 400
+
+    return Response(
+        stream_with_context(batch_service.stream_results(staged, language)),
+        mimetype='application/x-ndjson',
+        headers={'X-Batch-Id': batch_service.batch_id, 'X-Batch-Size': str(len(staged))}
+    )
+
+
+@main_blueprint.route('/transcripts/<job_id>', methods=['GET'])
+def get_transcript(job_id):
+    """Return a stored transcript with its segments, timing and metadata."""
+    record = NativeThreadRunner.run(TranscriptStore.from_config(current_app.config).get, job_id)
+    if record is None:
+        return jsonify({"error": f"Transcript {job_id} not found"}), 404
+    if request.args.get('format') == 'txt':
+        return send_file(
+            io.BytesIO(record['text'].encode('utf-8')),
+            mimetype='text/plain; charset=utf-8',
+            as_attachment=True,
+            download_name=TranscriptionService.transcript_download_name(record['filename'])
+        )
+    return jsonify(record), 200
+
+
+@main_blueprint.route('/memory', methods=['GET'])
+def memory_report():
+    """Report memory usage, budget headroom and the models currently loaded."""
+    return jsonify(WhisperModelPool.from_config(current_app.config).memory.report()), 200
 
 
 @main_blueprint.route('/health', methods=['GET'])
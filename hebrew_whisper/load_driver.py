@@ -0,0 +1,209 @@
+"""
+Local load driver proving the server stays responsive while models run.
+
+Start the server with the stub model, then run the driver against it:
+
+    STUB_MODEL=true STUB_MODEL_SECONDS=3 python run.py
+    python load_driver.py --url http://127.0.0.1:10000 --socket-clients 20 --rest-clients 10
+
+To exercise model loading as well, allow several stub models, unload them quickly
+when idle and have the clients rotate through them:
+
+    STUB_MODEL=true ALLOWED_MODELS=stub-a,stub-b MODEL_IDLE_UNLOAD_SECONDS=2 \
+        MEMORY_REAPER_INTERVAL_SECONDS=1 python run.py
+    python load_driver.py --models stub-a,stub-b
+
+Socket.IO clients request transcriptions over the socket, REST clients post to
+/api/transcribe, and a prober times /api/health throughout. The run fails if health
+latency exceeds --max-latency or any Socket.IO client is disconnected unexpectedly.
+"""
+import argparse
+import logging
+import math
+import os
+import statistics
+import struct
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+import requests
+import socketio
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def write_test_tone(path, seconds=1.0, rate=16000):
+    """Write a short mono 16-bit WAV tone for the clients to submit."""
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        frames = (int(8000 * math.sin(2 * math.pi * 440 * i / rate)) for i in range(int(seconds * rate)))
+        f.writeframes(b''.join(struct.pack('<h', s) for s in frames))
+
+
+class LoadDriver:
+    """Drive concurrent Socket.IO and REST clients and record server responsiveness."""
+
+    def __init__(self, url, audio_path, socket_clients, rest_clients, requests_per_client, timeout, models=()):
+        self.url = url.rstrip('/')
+        self.audio_path = audio_path
+        self.socket_clients = socket_clients
+        self.rest_clients = rest_clients
+        self.requests_per_client = requests_per_client
+        self.timeout = timeout
+        self.models = list(models)
+        self.health_latencies = []
+        self.job_latencies = []
+        self.errors = []
+        self.unexpected_disconnects = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _record(self, attr, value):
+        with self._lock:
+            getattr(self, attr).append(value)
+
+    def _request_fields(self, index, attempt, language='he'):
+        """Form or event fields for one request, rotating through the requested models."""
+        fields = {'language': language}
+        if self.models:
+            fields['model'] = self.models[(index + attempt) % len(self.models)]
+        return fields
+
+    def probe_health(self):
+        """Time /api/health every 100 ms until the run ends."""
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            try:
+                requests.get(f"{self.url}/api/health", timeout=self.timeout).raise_for_status()
+                self._record('health_latencies', time.perf_counter() - started)
+            except requests.RequestException as e:
+                self._record('errors', f"health: {e}")
+                self._record('health_latencies', time.perf_counter() - started)
+            self._stop.wait(0.1)
+
+    def run_socket_client(self, index):
+        """Connect over Socket.IO and request transcriptions one after another."""
+        client = socketio.Client(reconnection=False)
+        done = threading.Event()
+        state = {'finished': False}
+
+        @client.on('transcription_complete')
+        def on_complete(data):
+            done.set()
+
+        @client.on('error')
+        def on_error(data):
+            self._record('errors', f"socket {index}: {data}")
+            done.set()
+
+        @client.event
+        def disconnect():
+            if not state['finished']:
+                with self._lock:
+                    self.unexpected_disconnects += 1
+
+        try:
+            client.connect(self.url, wait_timeout=self.timeout)
+            for attempt in range(self.requests_per_client):
+                done.clear()
+                started = time.perf_counter()
+                client.emit('transcribe', dict(self._request_fields(index, attempt), file_path=self.audio_path))
+                if done.wait(self.timeout):
+                    self._record('job_latencies', time.perf_counter() - started)
+                else:
+                    self._record('errors', f"socket {index}: timed out")
+            state['finished'] = True
+            client.disconnect()
+        except Exception as e:
+            self._record('errors', f"socket {index}: {e}")
+
+    def run_rest_client(self, index):
+        """Post the test file to /api/transcribe repeatedly."""
+        with open(self.audio_path, 'rb') as f:
+            audio = f.read()
+        for attempt in range(self.requests_per_client):
+            started = time.perf_counter()
+            try:
+                # Unique trailing bytes keep the transcript store from answering out of its cache
+                payload = audio + os.urandom(16)
+                response = requests.post(f"{self.url}/api/transcribe", files={'file': (f"rest_{index}.wav", payload)},
+                                         data=self._request_fields(index, attempt), timeout=self.timeout)
+                response.raise_for_status()
+                self._record('job_latencies', time.perf_counter() - started)
+            except requests.RequestException as e:
+                self._record('errors', f"rest {index}: {e}")
+
+    def run(self):
+        """Run every client to completion and return the collected report."""
+        prober = threading.Thread(target=self.probe_health, daemon=True)
+        prober.start()
+        clients = [threading.Thread(target=self.run_socket_client, args=(i,)) for i in range(self.socket_clients)]
+        clients += [threading.Thread(target=self.run_rest_client, args=(i,)) for i in range(self.rest_clients)]
+        started = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        self._stop.set()
+        prober.join()
+        return self.report(time.perf_counter() - started)
+
+    @staticmethod
+    def _percentile(values, fraction):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def report(self, elapsed):
+        return {
+            'elapsed_seconds': round(elapsed, 2),
+            'jobs_completed': len(self.job_latencies),
+            'job_latency_median': round(statistics.median(self.job_latencies), 3) if self.job_latencies else None,
+            'health_probes': len(self.health_latencies),
+            'health_latency_p95': round(self._percentile(self.health_latencies, 0.95) or 0, 3),
+            'health_latency_max': round(max(self.health_latencies, default=0), 3),
+            'unexpected_disconnects': self.unexpected_disconnects,
+            'errors': len(self.errors),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:10000')
+    parser.add_argument('--socket-clients', type=int, default=20)
+    parser.add_argument('--rest-clients', type=int, default=10)
+    parser.add_argument('--requests-per-client', type=int, default=2)
+    parser.add_argument('--timeout', type=float, default=120.0, help='Seconds to wait for any single reply.')
+    parser.add_argument('--max-latency', type=float, default=1.0, help='Highest acceptable /api/health latency.')
+    parser.add_argument('--audio', help='Audio file to submit; a generated tone is used when omitted.')
+    parser.add_argument('--models', default='', help='Comma-separated models to rotate through; server default when empty.')
+    args = parser.parse_args()
+
+    audio_path = args.audio
+    if audio_path is None:
+        audio_path = os.path.join(tempfile.mkdtemp(), 'load_driver_tone.wav')
+        write_test_tone(audio_path)
+
+    driver = LoadDriver(args.url, os.path.abspath(audio_path), args.socket_clients, args.rest_clients,
+                        args.requests_per_client, args.timeout,
+                        models=[name for name in args.models.split(',') if name])
+    report = driver.run()
+    for key, value in report.items():
+        logger.info(f"{key}: {value}")
+    for error in driver.errors[:10]:
+        logger.warning(error)
+
+    responsive = report['health_latency_max'] <= args.max_latency and report['unexpected_disconnects'] == 0
+    logger.info("Server stayed responsive." if responsive else "Server was NOT responsive under load.")
+    sys.exit(0 if responsive and not driver.errors else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import gc
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+import torch
+
+try:
+    import psutil
+except ImportError:  # psutil is optional; fall back to /proc on Linux
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Approximate fp32 weight sizes of the stock Whisper variants, used until a model has been loaded once
+FOOTPRINT_ESTIMATES_MB = {
+    'tiny': 150,
+    'base': 290,
+    'small': 970,
+    'medium': 3060,
+    'large': 6170,
+    'turbo': 3240,
+}
+
+
+class _ModelEntry:
+    """Bookkeeping for one model held by the memory manager."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.model = None
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self.footprint_bytes = 0
+        self.load_lock = threading.Lock()
+
+
+class ModelMemoryManager:
+    """
+    Keep several models loaded within a host and device memory budget.
+
+    Models are held in least-recently-used order and loaded on first use. When process
+    RSS or device memory goes over its budget, idle models are unloaded starting with the
+    least recently used one; models with inferences in flight are never unloaded. Before a
+    model is loaded, idle models are unloaded until its expected footprint fits. Models
+    idle for longer than `idle_seconds` are unloaded by `unload_idle`. An unloaded model is
+    reloaded transparently the next time it is acquired.
+    """
+
+    def __init__(self, loader: Callable, memory_budget_mb: int = 0, device_budget_mb: int = 0,
+                 idle_seconds: float = 0, on_unload: Optional[Callable] = None):
+        """
+        Args:
+            loader (Callable): Called with a model name to load a model, e.g. `WhisperModel`.
+                Names may be Whisper variants ('base', 'medium') or paths to fine-tuned checkpoints.
+            memory_budget_mb (int): Host RSS budget in MB; 0 disables the limit.
+            device_budget_mb (int): CUDA memory budget in MB; 0 disables the limit.
+            idle_seconds (float): Idle time after which `unload_idle` unloads a model; 0 disables it.
+            on_unload (Callable): Called with a model just before it is unloaded, to release
+                resources tied to it.
+        """
+        self.loader = loader
+        self.memory_budget = memory_budget_mb * MB
+        self.device_budget = device_budget_mb * MB
+        self.idle_seconds = idle_seconds
+        self.on_unload = on_unload
+        self._entries: "OrderedDict[str, _ModelEntry]" = OrderedDict()
+        self._footprints: Dict[str, int] = {}  # Measured sizes, remembered across unloads
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def rss_bytes() -> int:
+        """Resident set size of the current process."""
+        if psutil is not None:
+            return psutil.Process().memory_info().rss
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError):
+            return 0
+
+    @staticmethod
+    def device_bytes() -> int:
+        """Memory currently allocated by torch on the CUDA device."""
+        if torch.cuda.is_available():
+            return torch.cuda.memory_allocated()
+        return 0
+
+    @staticmethod
+    def _footprint(model) -> int:
+        """Size of a model's parameters and buffers in bytes."""
+        module = getattr(model, 'model', model)
+        if not isinstance(module, torch.nn.Module):
+            return 0
+        tensors = list(module.parameters()) + list(module.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def expected_footprint(self, model_name: str) -> int:
+        """
+        Bytes a model is expected to take once loaded.
+
+        The size measured on an earlier load is used when there is one; otherwise a
+        checkpoint's file size, or the estimate for a stock Whisper variant.
+        """
+        if model_name in self._footprints:
+            return self._footprints[model_name]
+        if os.path.isfile(model_name):
+            return os.path.getsize(model_name)
+        variant = model_name.split('.')[0].split('-')[0]  # 'large-v3' -> 'large', 'base.en' -> 'base'
+        return FOOTPRINT_ESTIMATES_MB.get(variant, 0) * MB
+
+    def _over_budget(self, extra: int = 0) -> bool:
+        """
+        Whether usage, plus `extra` bytes about to be loaded, exceeds a budget.
+
+        A model being loaded lands on the CUDA device when one is available, otherwise
+        in host memory, so `extra` counts against that budget only.
+        """
+        on_device = torch.cuda.is_available()
+        if self.memory_budget and self.rss_bytes() + (0 if on_device else extra) > self.memory_budget:
+            return True
+        if self.device_budget and self.device_bytes() + (extra if on_device else 0) > self.device_budget:
+            return True
+        return False
+
+    def _unload(self, entry: _ModelEntry, reason: str) -> None:
+        """Drop an entry's model and release its memory. Caller holds `self._lock`."""
+        logger.info(f"Unloading model '{entry.name}' ({entry.footprint_bytes / MB:.0f} MB): {reason}.")
+        model, entry.model = entry.model, None
+        self._entries.pop(entry.name, None)
+        if self.on_unload is not None:
+            self.on_unload(model)
+        if hasattr(model, 'clean_up'):
+            model.clean_up()
+        del model
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def _enforce_budget(self, keep: Optional[str] = None, extra: int = 0) -> None:
+        """
+        Unload idle models in LRU order until usage is back within budget.
+
+        Args:
+            keep (str): Model that must not be unloaded.
+            extra (int): Bytes about to be loaded that must fit within the budget as well.
+        """
+        with self._lock:
+            while self._over_budget(extra):
+                victim = next(
+                    (e for e in self._entries.values()
+                     if e.in_use == 0 and e.model is not None and e.name != keep),
+                    None
+                )
+                if victim is None:
+                    if not any(e.model is not None for e in self._entries.values()):
+                        logger.warning("Memory budget exceeded with no models loaded.")
+                    elif keep is not None:
+                        logger.warning(f"Memory budget exceeded but no idle model other than '{keep}' can be unloaded.")
+                    else:
+                        logger.warning("Memory budget exceeded but no idle model can be unloaded.")
+                    return
+                self._unload(victim, "memory budget exceeded")
+
+    def _load(self, entry: _ModelEntry) -> None:
+        """Load an entry's model unless another thread already did."""
+        with entry.load_lock:
+            if entry.model is None:
+                # Make room for the model before loading it, not after it has pushed usage over
+                self._enforce_budget(keep=entry.name, extra=self.expected_footprint(entry.name))
+                model = self.loader(entry.name)
+                entry.footprint_bytes = self._footprint(model)
+                entry.model = model
+                with self._lock:
+                    self._footprints[entry.name] = entry.footprint_bytes
+                logger.info(f"Model '{entry.name}' loaded ({entry.footprint_bytes / MB:.0f} MB).")
+
+    @contextmanager
+    def acquire(self, model_name: str):
+        """
+        Borrow a model, loading it if needed, for the duration of a `with` block.
+
+        Args:
+            model_name (str): Model variant or checkpoint path.
+
+        Yields:
+            The loaded model.
+        """
+        with self._lock:
+            entry = self._entries.get(model_name)
+            if entry is None:
+                entry = _ModelEntry(model_name)
+                self._entries[model_name] = entry
+            self._entries.move_to_end(model_name)
+            entry.in_use += 1
+        try:
+            self._load(entry)
+            yield entry.model
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+                if entry.model is None and entry.in_use == 0:
+                    self._entries.pop(model_name, None)  # Load failed; forget the entry
+            # The model just released is the most recently used; evicting it would only force a reload
+            self._enforce_budget(keep=model_name)
+
+    def unload_idle(self, idle_seconds: Optional[float] = None) -> int:
+        """
+        Unload models that have not been used for `idle_seconds`.
+
+        Returns:
+            int: Number of models unloaded.
+        """
+        idle_seconds = self.idle_seconds if idle_seconds is None else idle_seconds
+        if not idle_seconds:
+            return 0
+        now = time.monotonic()
+        unloaded = 0
+        with self._lock:
+            for entry in list(self._entries.values()):
+                if entry.in_use == 0 and entry.model is not None and now - entry.last_used >= idle_seconds:
+                    self._unload(entry, f"idle for {now - entry.last_used:.0f}s")
+                    unloaded += 1
+        return unloaded
+
+    def report(self) -> Dict:
+        """Current memory usage, budgets, headroom and loaded models."""
+        rss, device = self.rss_bytes(), self.device_bytes()
+        now = time.monotonic()
+        with self._lock:
+            models = [
+                {
+                    "name": e.name,
+                    "loaded": e.model is not None,
+                    "in_use": e.in_use,
+                    "idle_seconds": round(now - e.last_used, 1),
+                    "footprint_mb": round(e.footprint_bytes / MB, 1),
+                }
+                for e in reversed(self._entries.values())  # Most recently used first
+            ]
+        return {
+            "rss_mb": round(rss / MB, 1),
+            "memory_budget_mb": round(self.memory_budget / MB, 1) or None,
+            "memory_headroom_mb": round((self.memory_budget - rss) / MB, 1) if self.memory_budget else None,
+            "device_mb": round(device / MB, 1),
+            "device_budget_mb": round(self.device_budget / MB, 1) or None,
+            "device_headroom_mb": round((self.device_budget - device) / MB, 1) if self.device_budget else None,
+            "models": models,
+        }
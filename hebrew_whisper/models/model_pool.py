@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict
+
+from models.memory_manager import ModelMemoryManager
+from models.parallel_transcriber import ParallelTranscriber
+from models.stub_model import StubWhisperModel
+from models.whisper_model import WhisperModel
+
+logger = logging.getLogger(__name__)
+
+
+class WhisperModelPool:
+    """
+    Process-wide pool of loaded Whisper models shared by every transcription entry point.
+
+    Loaded models are owned by a `ModelMemoryManager`, which keeps them within the
+    configured memory budget and reloads them on demand. Each model variant is guarded
+    by a semaphore limiting how many inferences run on it at the same time. A shared
+    executor schedules pool jobs so callers can submit many files and collect the
+    results as they complete. When a `ParallelTranscriber` is configured, long files
+    are split and decoded across worker processes sharing the pooled weights.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_concurrency: int = 1, max_workers: int = 4, memory: ModelMemoryManager = None,
+                 parallel: ParallelTranscriber = None):
+        """
+        Args:
+            max_concurrency (int): Concurrent inferences allowed per loaded model.
+            max_workers (int): Threads available for scheduled pool jobs.
+            memory (ModelMemoryManager): Owner of the loaded models; unbounded when omitted.
+            parallel (ParallelTranscriber): Splits long files across processes; disabled when omitted.
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_workers = max(1, max_workers)
+        self.memory = memory or ModelMemoryManager(loader=WhisperModel)
+        self.parallel = parallel
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="whisper-pool")
+
+    @classmethod
+    def get_instance(cls, max_concurrency: int = 1, max_workers: int = 4, memory: ModelMemoryManager = None,
+                     parallel: ParallelTranscriber = None) -> "WhisperModelPool":
+        """Return the shared pool, creating it on first use."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(max_concurrency=max_concurrency, max_workers=max_workers, memory=memory,
+                                    parallel=parallel)
+            return cls._instance
+
+    @classmethod
+    def from_config(cls, config) -> "WhisperModelPool":
+        """Return the shared pool sized from a Flask config mapping."""
+        if cls._instance is not None:
+            return cls._instance
+        stub = config.get('STUB_MODEL', False)
+        parallel = None
+        if config.get('PARALLEL_DECODE_WORKERS', 0) > 1 and not stub:
+            parallel = ParallelTranscriber(
+                workers=config.get('PARALLEL_DECODE_WORKERS'),
+                min_duration=config.get('PARALLEL_DECODE_MIN_SECONDS', 120),
+            )
+        memory = ModelMemoryManager(
+            loader=StubWhisperModel if stub else WhisperModel,
+            memory_budget_mb=config.get('MEMORY_BUDGET_MB', 0),
+            device_budget_mb=config.get('DEVICE_MEMORY_BUDGET_MB', 0),
+            idle_seconds=config.get('MODEL_IDLE_UNLOAD_SECONDS', 0),
+            on_unload=parallel.release if parallel else None,  # Stop the decoding processes holding its weights
+        )
+        return cls.get_instance(
+            max_concurrency=config.get('MODEL_POOL_CONCURRENCY', 1),
+            max_workers=config.get('MODEL_POOL_WORKERS', 4),
+            memory=memory,
+            parallel=parallel,
+        )
+
+    @staticmethod
+    def resolve_model_name(config, requested: str = None) -> str:
+        """
+        Pick the model for a request from a Flask config mapping.
+
+        Args:
+            config: Flask config mapping with MODEL_NAME and ALLOWED_MODELS.
+            requested (str): Model named by the client; the configured default when empty.
+
+        Returns:
+            str: The model name to pass to the pool.
+
+        Raises:
+            ValueError: If the requested model is not in ALLOWED_MODELS.
+        """
+        default = config.get('MODEL_NAME', 'medium')
+        if not requested:
+            return default
+        allowed = config.get('ALLOWED_MODELS') or (default,)
+        if requested not in allowed:
+            raise ValueError(f"Model '{requested}' is not available; choose one of: {', '.join(allowed)}.")
+        return requested
+
+    def _slot(self, model_name: str) -> threading.BoundedSemaphore:
+        """Return the concurrency slot guarding `model_name`."""
+        with self._lock:
+            slot = self._slots.get(model_name)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_concurrency)
+                self._slots[model_name] = slot
+            return slot
+
+    @contextmanager
+    def acquire(self, model_name: str = "medium"):
+        """
+        Borrow a model for the duration of a `with` block.
+
+        Args:
+            model_name (str): Whisper model variant to borrow.
+
+        Yields:
+            WhisperModel: The shared model instance.
+        """
+        with self._slot(model_name), self.memory.acquire(model_name) as model:
+            yield model
+
+    def transcribe(self, audio_path: str, language: str = "he", model_name: str = "medium") -> str:
+        """Transcribe a single file on a pooled model."""
+        if self.parallel is not None:
+            return self.transcribe_result(audio_path, language, model_name)['text']
+        with self.acquire(model_name) as model:
+            return model.transcribe(audio_path, language)
+
+    def transcribe_result(self, audio_path: str, language: str = "he", model_name: str = "medium") -> dict:
+        """
+        Transcribe a single file on a pooled model, returning text and segments.
+
+        The result's 'inference_seconds' covers only the time spent on the model, measured
+        once its concurrency slot is held and it is loaded; waiting for either is not included.
+        """
+        with self.acquire(model_name) as model:
+            started_at = time.perf_counter()
+            if self.parallel is not None:
+                result = self.parallel.transcribe_result(model, audio_path, language)
+            else:
+                result = model.transcribe_result(audio_path, language)
+            result['inference_seconds'] = round(time.perf_counter() - started_at, 3)
+            return result
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Schedule `fn(*args, **kwargs)` on the pool executor and return its future."""
+        return self.executor.submit(fn, *args, **kwargs)
@@ -0,0 +1,242 @@
+import atexit
+import logging
+import os
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from utilities.audio_decoder import SAMPLE_RATE, AudioDecoder
+from utilities.native_threads import NativeThreadRunner
+
+logger = logging.getLogger(__name__)
+
+# Whisper module shared with this worker process by its pool
+_worker_model = None
+
+
+def _init_worker(model, torch_threads: int):
+    """Process pool initializer: keep a reference to the shared model weights."""
+    global _worker_model
+    _worker_model = model
+    torch.set_num_threads(torch_threads)
+
+
+def _share_dense_tensors(model) -> None:
+    """
+    Move a module's dense parameters and buffers into shared memory.
+
+    `Module.share_memory` fails on sparse tensors, such as the `alignment_heads` buffer
+    of Whisper models; those are left alone and copied to the workers when pickled.
+    """
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        if tensor.layout == torch.strided:
+            tensor.share_memory_()
+
+
+def _transcribe_chunk(task, model=None) -> List[dict]:
+    """
+    Decode one chunk and return its segments on the file's timeline.
+
+    Pool workers use the model installed by `_init_worker`; in-process callers pass
+    `model` explicitly so concurrent transcriptions never share the global.
+    """
+    index, audio, offset, language, options = task
+    model = model if model is not None else _worker_model
+    result = model.transcribe(audio, language=language, **options)
+    return [
+        {'start': seg['start'] + offset, 'end': seg['end'] + offset, 'text': seg['text'], 'chunk': index}
+        for seg in result.get('segments', [])
+    ]
+
+
+class ParallelTranscriber:
+    """
+    Transcribe long audio by decoding independent chunks concurrently.
+
+    The audio is split at low-energy frames near evenly spaced targets, each chunk is
+    padded with a short overlap and decoded in a process pool whose workers share the
+    parent's model weights, and the segments are stitched back together: timestamps are
+    shifted onto the file's timeline and segments falling in a neighbour's overlap are
+    dropped.
+
+    One pool is started per model on first use and kept for later files; `release` shuts
+    it down when the model is unloaded. Processes serving through eventlet decode on CPU
+    in-process instead; see `pool_available`. Workers are started with forkserver (or spawn),
+    never forked from the server process, whose threads, OpenMP runtime and ffmpeg pipes
+    a forked child would inherit.
+    """
+
+    def __init__(self, workers: int = None, min_duration: float = 120.0, min_chunk: float = 60.0,
+                 overlap: float = 1.0, search_window: float = 5.0, frame: float = 0.05):
+        """
+        Args:
+            workers (int): Worker processes; defaults to the CPU count.
+            min_duration (float): Audio shorter than this (seconds) is decoded in-process.
+            min_chunk (float): Smallest chunk length in seconds.
+            overlap (float): Audio added on each side of a chunk, in seconds.
+            search_window (float): Distance around a split target searched for silence, in seconds.
+            frame (float): Length of the energy analysis frames, in seconds.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.min_duration = min_duration
+        self.min_chunk = min_chunk
+        self.overlap = overlap
+        self.search_window = search_window
+        self.frame = frame
+        self._pools: Dict[int, tuple] = {}  # id(model) -> (model, pool)
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _context():
+        """Multiprocessing context that starts workers without forking the server process."""
+        return mp.get_context('forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn')
+
+    @staticmethod
+    def pool_available() -> bool:
+        """
+        Whether worker processes can be driven from this process.
+
+        Under eventlet monkey patching the pool's result-handler thread becomes a green
+        thread whose pipe reads collide on the hub, and `map` never returns. Chunks are
+        then only decoded in parallel in unpatched processes such as worker.py.
+        """
+        return not NativeThreadRunner.is_green()
+
+    def _pool_for(self, model):
+        """Return the worker pool sharing `model`'s weights, starting it on first use."""
+        with self._lock:
+            entry = self._pools.get(id(model))
+            if entry is None:
+                _share_dense_tensors(model)
+                torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+                pool = self._context().Pool(self.workers, initializer=_init_worker, initargs=(model, torch_threads))
+                entry = self._pools[id(model)] = (model, pool)
+                logger.info(f"Started {self.workers} decoding processes sharing the model weights.")
+            return entry[1]
+
+    def release(self, whisper_model) -> None:
+        """Shut down the worker pool of a model that is being unloaded."""
+        model = getattr(whisper_model, 'model', whisper_model)
+        with self._lock:
+            entry = self._pools.pop(id(model), None)
+        if entry is not None:
+            entry[1].terminate()
+            entry[1].join()
+
+    def close(self) -> None:
+        """Shut down every worker pool."""
+        with self._lock:
+            pools = [pool for _, pool in self._pools.values()]
+            self._pools.clear()
+        for pool in pools:
+            pool.terminate()
+            pool.join()
+
+    def split_points(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        Split audio into contiguous (start, end) sample ranges ending at low-energy frames.
+
+        Args:
+            audio (np.ndarray): 16 kHz mono samples.
+
+        Returns:
+            list[tuple[int, int]]: Chunk boundaries in samples covering the whole input.
+        """
+        total = len(audio)
+        duration = total / SAMPLE_RATE
+        n_chunks = max(1, min(self.workers, int(duration // self.min_chunk)))
+        if n_chunks == 1:
+            return [(0, total)]
+
+        frame_len = int(self.frame * SAMPLE_RATE)
+        n_frames = total // frame_len
+        frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+        energy = np.sqrt(np.einsum('ij,ij->i', frames, frames) / frame_len)  # Frame RMS without copying the audio
+
+        window = int(self.search_window / self.frame)
+        bounds, start = [], 0
+        for k in range(1, n_chunks):
+            target = int(k * n_frames / n_chunks)
+            lo, hi = max(target - window, 1), min(target + window, n_frames - 1)
+            split = (lo + int(np.argmin(energy[lo:hi]))) * frame_len if hi > lo else target * frame_len
+            if split > start:
+                bounds.append((start, split))
+                start = split
+        bounds.append((start, total))
+        return bounds
+
+    @staticmethod
+    def stitch(chunk_segments: List[List[dict]], bounds: List[Tuple[int, int]]) -> List[dict]:
+        """
+        Merge per-chunk segments into one timeline.
+
+        A segment is kept only by the chunk whose own range contains its midpoint, so text
+        decoded twice inside an overlap appears once. Identical consecutive texts left at
+        a boundary are collapsed as well.
+        """
+        merged = []
+        for segments, (start, end) in zip(chunk_segments, bounds):
+            own_start, own_end = start / SAMPLE_RATE, end / SAMPLE_RATE
+            for seg in segments:
+                midpoint = (seg['start'] + seg['end']) / 2
+                if not own_start <= midpoint < own_end:
+                    continue
+                if merged and seg['text'].strip() == merged[-1]['text'].strip() \
+                        and seg['start'] < merged[-1]['end']:
+                    continue
+                merged.append({'start': max(seg['start'], 0.0), 'end': seg['end'], 'text': seg['text']})
+        merged.sort(key=lambda seg: seg['start'])
+        return merged
+
+    def transcribe_result(self, whisper_model, audio_path: str, language: str = "he") -> dict:
+        """
+        Transcribe a file, decoding it in parallel when it is long enough.
+
+        Args:
+            whisper_model (WhisperModel): Loaded model whose weights the workers share.
+            audio_path (str): Path to the audio file.
+            language (str): Language code to skip detection.
+
+        Returns:
+            dict: Result with 'text', 'segments' and 'language' keys, like `WhisperModel.transcribe_result`.
+        """
+        audio = AudioDecoder.get_instance().decode(audio_path)
+        on_cuda = whisper_model.device.type == "cuda"
+        if len(audio) / SAMPLE_RATE >= self.min_duration and not on_cuda and not self.pool_available():
+            logger.info(f"Decoding {audio_path} in-process; worker processes cannot be driven under eventlet.")
+            return whisper_model.transcribe_result(audio, language)
+        bounds = self.split_points(audio) if len(audio) / SAMPLE_RATE >= self.min_duration else [(0, len(audio))]
+        if len(bounds) == 1:
+            return whisper_model.transcribe_result(audio, language)
+
+        pad = int(self.overlap * SAMPLE_RATE)
+        options = {'beam_size': whisper_model.beam_size, 'temperature': whisper_model.temperature}
+        tasks = []
+        for index, (start, end) in enumerate(bounds):
+            chunk_start = max(start - pad, 0)
+            tasks.append((index, audio[chunk_start:min(end + pad, len(audio))], chunk_start / SAMPLE_RATE,
+                          language, options))
+
+        model = whisper_model.model
+        if on_cuda:
+            # CUDA contexts cannot be forked; decode the chunks in-process on the GPU instead
+            logger.info(f"Decoding {len(tasks)} chunks of {audio_path} sequentially on CUDA.")
+            chunk_segments = [NativeThreadRunner.run(_transcribe_chunk, task, model) for task in tasks]
+        else:
+            logger.info(f"Decoding {len(tasks)} chunks of {audio_path} across {self.workers} processes.")
+            chunk_segments = self._pool_for(model).map(_transcribe_chunk, tasks, chunksize=1)
+
+        segments = self.stitch(chunk_segments, bounds)
+        return {
+            'text': ''.join(seg['text'] for seg in segments),
+            'segments': segments,
+            'language': language,
+        }
+
+    def transcribe(self, whisper_model, audio_path: str, language: str = "he") -> str:
+        """Transcribe a file and return only its text, like `WhisperModel.transcribe`."""
+        return self.transcribe_result(whisper_model, audio_path, language)['text']
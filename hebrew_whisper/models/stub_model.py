@@ -0,0 +1,58 @@
+import logging
+import os
+import time
+
+import torch
+
+from utilities.native_threads import NativeThreadRunner
+
+try:
+    from eventlet import patcher
+    _blocking_sleep = patcher.original('time').sleep  # Blocks the OS thread even when time is monkey patched
+except ImportError:
+    _blocking_sleep = time.sleep
+
+logger = logging.getLogger(__name__)
+
+
+class StubWhisperModel:
+    """
+    Stand-in for `WhisperModel` used to load-test the server without model weights.
+
+    Loading holds an OS thread for `load_seconds` and each transcription for `seconds`,
+    like loading weights and running inference do, through the same native-thread path,
+    so a server that blocks its event loop on either is exposed without needing a GPU or
+    a model download.
+    """
+
+    def __init__(self, model_name="stub", seconds=None, load_seconds=None, beam_size=3, temperature=0.3):
+        self.model_name = model_name
+        self.seconds = float(os.getenv('STUB_MODEL_SECONDS', 2.0)) if seconds is None else seconds
+        self.load_seconds = float(os.getenv('STUB_MODEL_LOAD_SECONDS', 1.0)) if load_seconds is None else load_seconds
+        self.device = torch.device("cpu")
+        self.beam_size = beam_size
+        self.temperature = temperature
+        NativeThreadRunner.run(_blocking_sleep, self.load_seconds)
+        self.model = None
+        logger.info(f"Loaded stub model '{model_name}' in {self.load_seconds}s ({self.seconds}s per transcription).")
+
+    def _infer(self, name):
+        _blocking_sleep(self.seconds)
+        return f"Stub transcription of {name}"
+
+    def transcribe_result(self, audio_path, language="he") -> dict:
+        """Simulate a transcription, returning the same shape as `WhisperModel.transcribe_result`."""
+        name = os.path.basename(audio_path) if isinstance(audio_path, str) else "audio"
+        text = NativeThreadRunner.run(self._infer, name)
+        return {
+            'text': text,
+            'segments': [{'start': 0.0, 'end': self.seconds, 'text': text}],
+            'language': language,
+        }
+
+    def transcribe(self, audio_path, language="he"):
+        """Simulate a transcription and return its text."""
+        return self.transcribe_result(audio_path, language)['text']
+
+    def clean_up(self):
+        """Nothing to release for the stub."""
@@ -1,11 +1,15 @@
 import whisper
 import torch
-import torchaudio
 import logging
+import os
+import shutil
+import urllib.request
 from whisper.decoding import DecodingResult
 from typing import Any, List
 from multiprocessing import Pool, cpu_count
 import warnings
+from utilities.audio_decoder import AudioDecoder
+from utilities.native_threads import NativeThreadRunner
 
 # Suppress specific warnings from torch
 warnings.filterwarnings("ignore", category=FutureWarning, module="torch")
@@ -15,16 +19,6 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class WhisperModelSingleton:
-    _instance = None
-
-    @classmethod
-    def get_instance(cls, model_name="medium"):
-        if cls._instance is None:
-            cls._instance = WhisperModel(model_name)
-        return cls._instance
-
-
 class WhisperModel:
     def __init__(self, model_name="medium", beam_size=3, temperature=0.3):
         """
@@ -40,10 +34,55 @@ class WhisperModel:
         self.beam_size = beam_size
         self.temperature = temperature
 
+    @staticmethod
+    def _download_root() -> str:
+        """Whisper's own checkpoint cache directory."""
+        default = os.path.join(os.path.expanduser("~"), ".cache")
+        return os.path.join(os.getenv("XDG_CACHE_HOME", default), "whisper")
+
+    def _fetch_weights(self, model_name: str) -> None:
+        """
+        Download a stock model's checkpoint into whisper's cache unless it is already there.
+
+        Runs on the calling green thread: the transfer is network I/O that eventlet
+        multiplexes. Verifying the checksum is left to `whisper.load_model`.
+
+        Args:
+            model_name (str): Whisper model variant; checkpoint paths need no download.
+        """
+        url = whisper._MODELS.get(model_name)
+        if url is None:
+            return
+        root = self._download_root()
+        target = os.path.join(root, os.path.basename(url))
+        if os.path.isfile(target):
+            return
+        logger.info(f"Downloading Whisper model weights: {model_name}")
+        os.makedirs(root, exist_ok=True)
+        partial = f"{target}.{os.getpid()}.part"
+        try:
+            with urllib.request.urlopen(url) as source, open(partial, "wb") as output:
+                shutil.copyfileobj(source, output, 1 << 20)
+            os.replace(partial, target)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def _load_weights(self, model_name: str):
+        """Deserialize a checkpoint onto the target device; CPU-bound, run on a native thread."""
+        model = whisper.load_model(model_name, device=self.device, download_root=self._download_root())
+        if self.device.type == "cuda":
+            model = model.half()  # Use mixed precision on CUDA
+        return model
+
     def _load_model_safe(self, model_name: str):
         """
         Safely load a Whisper model, setting weights_only=True for security.
 
+        The weights are downloaded on the calling green thread, and the checksum,
+        `torch.load` and the move to the device run on a native thread, so loading and
+        reloading a model does not stall the eventlet hub.
+
         Args:
             model_name (str): Whisper model variant to load.
 
@@ -52,9 +91,8 @@ class WhisperModel:
         """
         logger.info(f"Loading Whisper model: {model_name}")
         try:
-            model = whisper.load_model(model_name).to(self.device)
-            if self.device.type == "cuda":
-                model = model.half()  # Use mixed precision on CUDA
+            self._fetch_weights(model_name)
+            model = NativeThreadRunner.run(self._load_weights, model_name)
             logger.info("Model loaded successfully.")
             return model
         except Exception as e:
@@ -73,12 +111,10 @@ class WhisperModel:
         """
         logger.info(f"Preprocessing audio: {audio_path}")
         try:
-            audio, sample_rate = torchaudio.load(audio_path)
-            if sample_rate != 16000:
-                logger.info(f"Resampling audio from {sample_rate} Hz to 16000 Hz.")
-                resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=16000)
-                audio = resampler(audio)
-            audio = audio / torch.max(torch.abs(audio))  # Normalize audio
+            audio = torch.from_numpy(AudioDecoder.get_instance().decode(audio_path))  # 16 kHz mono
+            peak = torch.max(torch.abs(audio)) if audio.numel() else 0
+            if peak > 0:
+                audio = audio / peak  # Normalize audio
             return audio.to(self.device)
         except Exception as e:
             logger.error(f"Error during audio preprocessing: {e}", exc_info=True)
@@ -106,6 +142,34 @@ class WhisperModel:
         logger.error(f"Unexpected result type: {type(result).__name__}")
         return "Error: Unexpected result type received."
 
+    def transcribe_result(self, audio_path, language="he") -> dict:
+        """
+        Transcribe audio and return the full result, including timed segments.
+
+        Args:
+            audio_path (str | np.ndarray): Path to the audio file, or 16 kHz mono samples.
+            language (str): Language code to skip detection.
+
+        Returns:
+            dict: Result with 'text', 'segments' and 'language' keys.
+        """
+        logger.info(f"Starting transcription on {self.device}")
+        # Decode through the shared decoder rather than whisper's own ffmpeg subprocess
+        audio = AudioDecoder.get_instance().decode(audio_path) if isinstance(audio_path, str) else audio_path
+        # Inference runs on a native thread so it does not stall the eventlet hub
+        result = NativeThreadRunner.run(
+            self.model.transcribe, audio, language=language, beam_size=self.beam_size, temperature=self.temperature
+        )
+        logger.debug(f"Raw transcription result: {result}")
+        segments = result.get('segments', []) if isinstance(result, dict) else []
+        return {
+            'text': self.validate_result(result),
+            'segments': [
+                {'start': seg['start'], 'end': seg['end'], 'text': seg['text']} for seg in segments
+            ],
+            'language': language,
+        }
+
     def transcribe(self, audio_path: str, language="he"):
         """
         Transcribe audio using the Whisper model, optimized for GPU usage.
@@ -117,25 +181,20 @@ class WhisperModel:
         Returns:
             str: Transcribed text.
         """
-        logger.info(f"Starting transcription on {self.device}")
         try:
-            audio = self.preprocess_audio(audio_path)
-            result = self.model.transcribe(
-                audio_path, language=language, beam_size=self.beam_size, temperature=self.temperature
-            )
-            logger.debug(f"Raw transcription result: {result}")
-            return self.validate_result(result)
+            return self.transcribe_result(audio_path, language)['text']
         except Exception as e:
             logger.error(f"Error during transcription: {e}", exc_info=True)
             return f"Error: {str(e)}"
 
     def clean_up(self):
         """
-        Explicitly release GPU memory to reduce memory consumption.
+        Explicitly release the model weights and any cached GPU memory.
         """
-        logger.info("Cleaning up model and freeing GPU memory.")
-        del self.model
-        torch.cuda.empty_cache()
+        logger.info("Cleaning up model and freeing memory.")
+        self.model = None
+        if self.device.type == "cuda":
+            torch.cuda.empty_cache()
 
     def batch_transcribe(self, audio_paths: List[str], language="he"):
         """
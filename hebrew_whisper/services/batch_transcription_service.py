@@ -0,0 +1,255 @@
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+import zipfile
+from concurrent.futures import as_completed, wait
+from typing import Iterator, List, Tuple
+
+from models.model_pool import WhisperModelPool
+from services.job_queue import JobQueue, wait_for_jobs
+from utilities.native_threads import NativeThreadRunner
+from utilities.transcript_store import TranscriptStore
+
+logger = logging.getLogger(__name__)
+
+
+class BatchTranscriptionService:
+    """
+    Transcribe many uploads in one request through the shared model pool.
+
+    Uploaded files (or the audio members of uploaded zip archives) are staged in a
+    per-batch directory, scheduled on the pool together and reported back as NDJSON
+    lines in completion order. Every result is kept in the transcript store. Given a
+    job queue instead of a pool, the files are queued for the inference workers.
+    """
+
+    def __init__(self, pool: WhisperModelPool = None, store: TranscriptStore = None, uploads_dir='./uploads',
+                 audio_extensions=('.wav',), max_files=100, model_name='medium',
+                 max_file_bytes=200 * 1024 * 1024, max_batch_bytes=1024 * 1024 * 1024,
+                 job_queue: JobQueue = None, job_options=None):
+        self.pool = pool
+        self.store = store
+        self.job_queue = job_queue
+        self.job_options = job_options or {}
+        self.audio_extensions = tuple(ext.lower() for ext in audio_extensions)
+        self.max_files = max_files
+        self.max_file_bytes = max_file_bytes
+        self.max_batch_bytes = max_batch_bytes
+        self.staged_bytes = 0
+        self.model_name = model_name
+        self.batch_id = uuid.uuid4().hex
+        self.batch_dir = os.path.join(uploads_dir, f"batch_{self.batch_id}")
+        os.makedirs(self.batch_dir, exist_ok=True)
+
+    def _staged_path(self, index: int, filename: str) -> str:
+        """Build a collision-free path for a staged file, keeping only its base name."""
+        return os.path.join(self.batch_dir, f"{index:04d}_{os.path.basename(filename)}")
+
+    def _is_audio(self, filename: str) -> bool:
+        return os.path.splitext(filename)[1].lower() in self.audio_extensions
+
+    def _check_size(self, filename: str, size: int) -> None:
+        """Reject a file larger than the per-file cap or one that would push the batch over its cap."""
+        if size > self.max_file_bytes:
+            raise ValueError(f"'{filename}' exceeds the limit of {self.max_file_bytes} bytes per file.")
+        if self.staged_bytes + size > self.max_batch_bytes:
+            raise ValueError(f"Batch exceeds the limit of {self.max_batch_bytes} bytes.")
+
+    def _extract_member(self, archive: zipfile.ZipFile, member: zipfile.ZipInfo, path: str) -> None:
+        """
+        Extract one zip member under the size caps.
+
+        The declared size is checked first, and the bytes actually written are counted
+        too, so a member that inflates past what its header claims is still stopped.
+        """
+        self._check_size(member.filename, member.file_size)
+        written = 0
+        with archive.open(member) as src, open(path, 'wb') as dst:
+            for chunk in iter(lambda: src.read(1 << 20), b''):
+                written += len(chunk)
+                self._check_size(member.filename, written)
+                dst.write(chunk)
+        self.staged_bytes += written
+
+    def stage_uploads(self, files) -> List[Tuple[str, str]]:
+        """
+        Save uploaded files, expanding zip archives into their audio members.
+
+        Args:
+            files: Iterable of Werkzeug `FileStorage` objects.
+
+        Returns:
+            list[tuple[str, str]]: (original filename, staged path) pairs.
+        """
+        staged = []
+        for file in files:
+            if not file or not file.filename:
+                continue
+            if file.filename.lower().endswith('.zip'):
+                staged.extend(self._stage_archive(file, len(staged)))
+            else:
+                path = self._staged_path(len(staged), file.filename)
+                file.save(path)
+                staged.append((file.filename, path))
+                size = os.path.getsize(path)
+                self._check_size(file.filename, size)
+                self.staged_bytes += size
+            if len(staged) > self.max_files:
+                raise ValueError(f"Batch exceeds the limit of {self.max_files} files.")
+        return staged
+
+    def _stage_archive(self, file, start_index: int) -> List[Tuple[str, str]]:
+        """Extract the audio members of an uploaded zip archive."""
+        staged = []
+        try:
+            with zipfile.ZipFile(file.stream) as archive:
+                for member in archive.infolist():
+                    if member.is_dir() or not self._is_audio(member.filename):
+                        continue
+                    path = self._staged_path(start_index + len(staged), member.filename)
+                    self._extract_member(archive, member, path)
+                    staged.append((member.filename, path))
+                    if start_index + len(staged) > self.max_files:
+                        raise ValueError(f"Batch exceeds the limit of {self.max_files} files.")
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"Invalid zip archive '{file.filename}': {e}")
+        return staged
+
+    def _run_one(self, filename: str, path: str, language: str, submitted_at: float) -> dict:
+        """
+        Transcribe one staged file and collect its timing.
+
+        `transcribe_seconds` is the time spent on the model; everything before it, including
+        the wait for a free executor thread and for the model's concurrency slot, is queued time.
+        """
+        job_id, transcription, status, error = None, None, "ok", None
+        transcribe_seconds = 0.0
+        try:
+            # Executor threads are green under eventlet; hashing and SQLite must not block the hub
+            audio_hash = NativeThreadRunner.run(self.store.hash_audio, path)
+            record = NativeThreadRunner.run(self.store.find_by_audio, audio_hash, language, self.model_name)
+            if record is None:
+                result = self.pool.transcribe_result(path, language, self.model_name)
+                job_id = NativeThreadRunner.run(
+                    self.store.put, audio_hash, result['text'], segments=result['segments'],
+                    timing={"transcribe_seconds": result['inference_seconds']},
+                    metadata={"batch_id": self.batch_id}, filename=filename,
+                    language=language, model_name=self.model_name
+                )
+                transcription, transcribe_seconds = result['text'], result['inference_seconds']
+            else:
+                job_id, transcription = record['job_id'], record['text']
+        except Exception as e:
+            logger.error(f"Batch {self.batch_id}: failed to transcribe {filename}: {e}", exc_info=True)
+            status, error = "error", str(e)
+        total_seconds = round(time.perf_counter() - submitted_at, 3)
+        return {
+            "job_id": job_id,
+            "filename": filename,
+            "status": status,
+            "transcription": transcription,
+            "error": error,
+            "timing": {
+                "queued_seconds": round(max(total_seconds - transcribe_seconds, 0.0), 3),
+                "transcribe_seconds": transcribe_seconds,
+                "total_seconds": total_seconds,
+            },
+        }
+
+    def stream_results(self, staged: List[Tuple[str, str]], language: str = 'he') -> Iterator[str]:
+        """
+        Schedule every staged file and yield one NDJSON line per file as it finishes.
+
+        Args:
+            staged (list[tuple[str, str]]): Output of `stage_uploads`.
+            language (str): Language code passed to the model.
+
+        Yields:
+            str: A JSON document terminated by a newline.
+        """
+        if self.job_queue is not None:
+            yield from self._stream_queued(staged, language)
+            return
+
+        futures = {}
+        try:
+            submitted_at = time.perf_counter()
+            futures = {
+                self.pool.submit(self._run_one, filename, path, language, submitted_at): index
+                for index, (filename, path) in enumerate(staged)
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                result["index"] = futures[future]
+                result["batch_id"] = self.batch_id
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        finally:
+            # Drop work that has not started yet if the client went away mid-stream, and let
+            # files already being transcribed finish before their staging directory goes
+            running = [future for future in futures if not future.cancel()]
+            wait(running)
+            self.clean_up()
+
+    def _stream_queued(self, staged: List[Tuple[str, str]], language: str) -> Iterator[str]:
+        """Queue every staged file for the inference workers and stream their results."""
+        timeout = self.job_options.get('timeout')
+        poll_interval = self.job_options.get('poll_interval', 0.5)
+        origin = f"batch-{self.batch_id}"
+        jobs = {}
+        try:
+            submitted_at = time.perf_counter()
+            for index, (filename, path) in enumerate(staged):
+                payload = {'file_path': os.path.abspath(path), 'language': language, 'model_name': self.model_name,
+                           'filename': filename, 'metadata': {'batch_id': self.batch_id}}
+                job_id = NativeThreadRunner.run(self.job_queue.enqueue, payload, origin, None,
+                                                self.job_options.get('max_attempts', 3))
+                jobs[job_id] = (index, filename)
+            pending = set(jobs)
+            try:
+                for job in wait_for_jobs(self.job_queue, list(jobs), poll_interval,
+                                         timeout * len(jobs) if timeout else None):
+                    pending.discard(job['job_id'])
+                    yield self._queued_line(job, jobs[job['job_id']], submitted_at)
+            except TimeoutError as e:
+                for job_id in sorted(pending, key=lambda j: jobs[j][0]):
+                    yield self._queued_line({'job_id': job_id, 'status': 'failed', 'error': str(e)},
+                                            jobs[job_id], submitted_at)
+        finally:
+            # Withdraw jobs no worker has claimed yet, and let running ones finish before
+            # their staging directory goes
+            running = [job_id for job_id in jobs if not NativeThreadRunner.run(self.job_queue.cancel, job_id)]
+            try:
+                for _ in wait_for_jobs(self.job_queue, running, poll_interval, timeout):
+                    pass
+            except TimeoutError:
+                logger.warning(f"Batch {self.batch_id}: removing staged files while jobs are still running.")
+            self.clean_up()
+
+    def _queued_line(self, job: dict, position: Tuple[int, str], submitted_at: float) -> str:
+        """Format a finished job like the NDJSON lines of in-process batches."""
+        index, filename = position
+        result = job.get('result') or {}
+        total = round(time.perf_counter() - submitted_at, 3)
+        transcribe_seconds = result.get('transcribe_seconds', 0.0)
+        line = {
+            "job_id": result.get('transcript_id'),
+            "filename": filename,
+            "status": "ok" if job['status'] == 'done' else "error",
+            "transcription": result.get('transcription'),
+            "error": job.get('error') if job['status'] != 'done' else None,
+            "timing": {
+                "queued_seconds": round(max(total - transcribe_seconds, 0.0), 3),
+                "transcribe_seconds": transcribe_seconds,
+                "total_seconds": total,
+            },
+            "index": index,
+            "batch_id": self.batch_id,
+        }
+        return json.dumps(line, ensure_ascii=False) + "\n"
+
+    def clean_up(self):
+        """Remove the batch staging directory."""
+        shutil.rmtree(self.batch_dir, ignore_errors=True)
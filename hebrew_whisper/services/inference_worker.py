@@ -0,0 +1,130 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import Dict
+
+from models.model_pool import WhisperModelPool
+from services.job_queue import JobQueue
+from utilities.transcript_store import TranscriptStore
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class InferenceWorker:
+    """
+    Claim transcription jobs from the job queue and run them on the shared model pool.
+
+    Each of the `concurrency` loops claims one job at a time under a lease, renews the
+    lease while the model runs, stores the transcript and reports the outcome back to the
+    queue, which relays it to the Socket.IO session that submitted the job. A reaper
+    thread unloads models that have sat idle for the memory manager's `idle_seconds`.
+    """
+
+    def __init__(self, queue: JobQueue, pool: WhisperModelPool, store: TranscriptStore, model_name='medium',
+                 concurrency=1, lease_seconds=120, poll_interval=0.5, reaper_interval=60):
+        self.queue = queue
+        self.pool = pool
+        self.store = store
+        self.model_name = model_name
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.reaper_interval = reaper_interval
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Stop claiming new jobs; jobs already running are finished first."""
+        self._stop.set()
+
+    def run(self):
+        """Run the claim loops until `stop` is called."""
+        logging.info(f"Inference worker {self.worker_id} started with {self.concurrency} loop(s).")
+        loops = [threading.Thread(target=self._loop, name=f"worker-loop-{i}") for i in range(self.concurrency)]
+        threading.Thread(target=self._reap_idle_models, name="worker-reaper", daemon=True).start()
+        for loop in loops:
+            loop.start()
+        for loop in loops:
+            loop.join()
+        logging.info(f"Inference worker {self.worker_id} stopped.")
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(self.worker_id, self.lease_seconds)
+            except Exception as e:
+                logging.error(f"Failed to claim a job: {e}", exc_info=True)
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self.process(job)
+
+    def _reap_idle_models(self):
+        """Periodically unload models that have been idle for too long."""
+        if not self.reaper_interval or not self.pool.memory.idle_seconds:
+            return
+        while not self._stop.wait(self.reaper_interval):
+            try:
+                self.pool.memory.unload_idle()
+            except Exception as e:
+                logging.error(f"Error unloading idle models: {e}", exc_info=True)
+
+    def _keep_lease(self, job_id: str, done: threading.Event):
+        """Renew the job's lease until `done` is set or the lease is lost."""
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                    logging.warning(f"Lost the lease on job {job_id}; its result will be discarded.")
+                    return
+            except Exception as e:
+                logging.error(f"Failed to renew the lease on job {job_id}: {e}")
+
+    def _transcribe(self, payload: Dict) -> Dict:
+        """Transcribe a job's file, reusing a stored transcript of the same audio when one exists."""
+        file_path = payload['file_path']
+        language = payload.get('language', 'he')
+        model_name = payload.get('model_name') or self.model_name
+        audio_hash = self.store.hash_audio(file_path)
+        record = self.store.find_by_audio(audio_hash, language, model_name)
+        if record is None:
+            result = self.pool.transcribe_result(file_path, language, model_name)
+            transcribe_seconds = result['inference_seconds']
+            transcript_id = self.store.put(
+                audio_hash, result['text'],
+                segments=result['segments'],
+                timing={"transcribe_seconds": transcribe_seconds},
+                metadata=dict(payload.get('metadata') or {}, worker_id=self.worker_id),
+                filename=payload.get('filename') or os.path.basename(file_path),
+                language=language,
+                model_name=model_name
+            )
+            return {'transcription': result['text'], 'transcript_id': transcript_id,
+                    'transcribe_seconds': transcribe_seconds}
+        return {'transcription': record['text'], 'transcript_id': record['job_id'], 'transcribe_seconds': 0.0}
+
+    def process(self, job: Dict):
+        """Run one claimed job and report its outcome."""
+        job_id = job['job_id']
+        logging.info(f"Processing job {job_id} (attempt {job['attempts']} of {job['max_attempts']}).")
+        done = threading.Event()
+        lease_keeper = threading.Thread(target=self._keep_lease, args=(job_id, done), daemon=True)
+        lease_keeper.start()
+        try:
+            self.queue.report_progress(job_id, self.worker_id, {'progress': 0, 'status': 'running',
+                                                                'attempt': job['attempts']})
+            result = self._transcribe(job['payload'])
+            if not self.queue.complete(job_id, self.worker_id, result):
+                logging.warning(f"Job {job_id} was reassigned before it finished; result discarded.")
+        except Exception as e:
+            logging.error(f"Job {job_id} failed: {e}", exc_info=True)
+            try:
+                self.queue.fail(job_id, self.worker_id, str(e))
+            except Exception as report_error:
+                logging.error(f"Failed to record the failure of job {job_id}: {report_error}")
+        finally:
+            done.set()
+            lease_keeper.join()
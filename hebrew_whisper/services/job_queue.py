@@ -0,0 +1,343 @@
+import importlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional
+
+from utilities.native_threads import NativeThreadRunner
+from utilities.sqlite_database import SQLiteDatabase
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class JobQueue(ABC):
+    """
+    Durable queue of inference jobs shared by web processes and inference workers.
+
+    Web processes `enqueue` jobs tagged with their own `origin` and the Socket.IO session
+    that asked for them. Workers `claim` jobs under a time-limited lease, keep it alive
+    with `heartbeat`, and finish with `complete` or `fail`; a job whose lease runs out is
+    handed to another worker, and failed jobs are retried up to `max_attempts` times.
+    Progress and results are recorded as events that each web process reads back with
+    `poll_events` and relays to the submitting session. `purge_events` drops events and
+    finished jobs older than the retention period.
+
+    Subclasses implement the storage; see `SQLiteJobQueue`.
+    """
+
+    @abstractmethod
+    def enqueue(self, payload: Dict, origin: str, sid: Optional[str] = None, max_attempts: int = 3) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def report_progress(self, job_id: str, worker_id: str, data: Dict) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str, result: Dict) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str, retry_delay: float = 5.0) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def cancel(self, job_id: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def poll_events(self, origin: str, after_id: int = 0, limit: int = 100) -> List[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def purge_events(self, older_than_seconds: float) -> int:
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(JobQueue, SQLiteDatabase):
+    """Job queue stored in a local SQLite database, safe to share between processes."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id        TEXT PRIMARY KEY,
+            payload       TEXT NOT NULL,
+            status        TEXT NOT NULL,
+            attempts      INTEGER NOT NULL DEFAULT 0,
+            max_attempts  INTEGER NOT NULL,
+            origin        TEXT NOT NULL,
+            sid           TEXT,
+            worker_id     TEXT,
+            lease_expires REAL,
+            available_at  REAL NOT NULL,
+            result        TEXT,
+            error         TEXT,
+            created_at    REAL NOT NULL,
+            updated_at    REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, available_at);
+        CREATE TABLE IF NOT EXISTS job_events (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id      TEXT NOT NULL,
+            origin      TEXT NOT NULL,
+            sid         TEXT,
+            event       TEXT NOT NULL,
+            data        TEXT NOT NULL,
+            created_at  REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_job_events_origin ON job_events (origin, id);
+    """
+    ISOLATION_LEVEL = None  # Transactions are opened explicitly with BEGIN IMMEDIATE
+    ROW_FACTORY = sqlite3.Row
+
+    @classmethod
+    def from_url(cls, url: str) -> "SQLiteJobQueue":
+        """Open the queue named by `sqlite:///relative.db` or `sqlite:////absolute.db`."""
+        if not url.startswith('sqlite:///'):
+            raise ValueError(f"Not an SQLite queue URL: {url}")
+        return cls(url[len('sqlite:///'):])
+
+    def _transaction(self):
+        """Open a write transaction up front so concurrent claimers serialize cleanly."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    @staticmethod
+    def _add_event(conn, job, event: str, data: Dict) -> None:
+        conn.execute(
+            "INSERT INTO job_events (job_id, origin, sid, event, data, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job['job_id'], job['origin'], job['sid'], event,
+             json.dumps(dict(data, job_id=job['job_id']), ensure_ascii=False), time.time())
+        )
+
+    def _run(self, action):
+        """Run `action(conn)` in a write transaction, rolling back on error."""
+        conn = self._transaction()
+        try:
+            result = action(conn)
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, payload: Dict, origin: str, sid: Optional[str] = None, max_attempts: int = 3) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+
+        def action(conn):
+            conn.execute(
+                "INSERT INTO jobs (job_id, payload, status, max_attempts, origin, sid, available_at, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(payload, ensure_ascii=False), max_attempts, origin, sid, now, now, now)
+            )
+        self._run(action)
+        return job_id
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Dict]:
+        def action(conn):
+            now = time.time()
+            while True:
+                job = conn.execute(
+                    "SELECT * FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+                    "OR (status = 'running' AND lease_expires < ?) ORDER BY created_at LIMIT 1",
+                    (now, now)
+                ).fetchone()
+                if job is None:
+                    return None
+                if job['attempts'] >= job['max_attempts']:
+                    # The lease of the last allowed attempt ran out; give up on the job
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, worker_id = NULL, updated_at = ? WHERE job_id = ?",
+                        ("Lease expired on the final attempt.", now, job['job_id'])
+                    )
+                    self._add_event(conn, job, 'error', {'error': "Transcription job failed: worker lease expired."})
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker_id = ?, lease_expires = ?, attempts = attempts + 1, "
+                    "updated_at = ? WHERE job_id = ?",
+                    (worker_id, now + lease_seconds, now, job['job_id'])
+                )
+                claimed = dict(job)
+                claimed.update(status='running', worker_id=worker_id, lease_expires=now + lease_seconds,
+                               attempts=job['attempts'] + 1)
+                claimed['payload'] = json.loads(claimed['payload'])
+                return claimed
+        return self._run(action)
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        def action(conn):
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE job_id = ? AND worker_id = ? AND status = 'running'",
+                (time.time() + lease_seconds, time.time(), job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+        return self._run(action)
+
+    def _owned_job(self, conn, job_id: str, worker_id: str):
+        return conn.execute(
+            "SELECT * FROM jobs WHERE job_id = ? AND worker_id = ? AND status = 'running'", (job_id, worker_id)
+        ).fetchone()
+
+    def report_progress(self, job_id: str, worker_id: str, data: Dict) -> None:
+        def action(conn):
+            job = self._owned_job(conn, job_id, worker_id)
+            if job is not None:
+                self._add_event(conn, job, 'update_progress', data)
+        self._run(action)
+
+    def complete(self, job_id: str, worker_id: str, result: Dict) -> bool:
+        def action(conn):
+            job = self._owned_job(conn, job_id, worker_id)
+            if job is None:
+                return False  # Lease lost; another worker owns the job now
+            conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, lease_expires = NULL, updated_at = ? WHERE job_id = ?",
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id)
+            )
+            self._add_event(conn, job, 'transcription_complete', result)
+            return True
+        return self._run(action)
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry_delay: float = 5.0) -> bool:
+        def action(conn):
+            job = self._owned_job(conn, job_id, worker_id)
+            if job is None:
+                return False
+            now = time.time()
+            if job['attempts'] < job['max_attempts']:
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, worker_id = NULL, lease_expires = NULL, "
+                    "available_at = ?, updated_at = ? WHERE job_id = ?",
+                    (error, now + retry_delay * job['attempts'], now, job_id)
+                )
+                self._add_event(conn, job, 'log_message', {
+                    'message': f"Attempt {job['attempts']} of {job['max_attempts']} failed; retrying."
+                })
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, worker_id = NULL, lease_expires = NULL, "
+                    "updated_at = ? WHERE job_id = ?",
+                    (error, now, job_id)
+                )
+                self._add_event(conn, job, 'error', {'error': error})
+            return True
+        return self._run(action)
+
+    def cancel(self, job_id: str) -> bool:
+        def action(conn):
+            return conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated_at = ? WHERE job_id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            ).rowcount == 1
+        return self._run(action)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._connection().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def poll_events(self, origin: str, after_id: int = 0, limit: int = 100) -> List[Dict]:
+        rows = self._connection().execute(
+            "SELECT id, job_id, sid, event, data FROM job_events WHERE origin = ? AND id > ? ORDER BY id LIMIT ?",
+            (origin, after_id, limit)
+        ).fetchall()
+        return [dict(row, data=json.loads(row['data'])) for row in rows]
+
+    def purge_events(self, older_than_seconds: float) -> int:
+        def action(conn):
+            cutoff = time.time() - older_than_seconds
+            events = conn.execute("DELETE FROM job_events WHERE created_at < ?", (cutoff,)).rowcount
+            # Finished jobs are only kept for as long as their events
+            jobs = conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINAL_STATUSES))}) AND updated_at < ?",
+                (*FINAL_STATUSES, cutoff)
+            ).rowcount
+            return events + jobs
+        return self._run(action)
+
+
+# Statuses a job never leaves
+FINAL_STATUSES = ('done', 'failed', 'cancelled')
+
+# Queue backends by URL scheme; register brokers here or name a class as 'module:Class://...'
+JOB_QUEUE_BACKENDS = {
+    'sqlite': SQLiteJobQueue.from_url,
+}
+
+
+def create_job_queue(url: str) -> JobQueue:
+    """
+    Create the job queue named by a URL.
+
+    `sqlite:///relative/path.db` and `sqlite:////absolute/path.db` select the built-in SQLite
+    queue. Any other scheme must be registered in `JOB_QUEUE_BACKENDS`, or be written as
+    `package.module:ClassName://...`, in which case the class is imported and called with
+    the full URL.
+    """
+    scheme = url.split('://', 1)[0]
+    if scheme in JOB_QUEUE_BACKENDS:
+        return JOB_QUEUE_BACKENDS[scheme](url)
+    if ':' in scheme:
+        module_name, class_name = scheme.split(':', 1)
+        return getattr(importlib.import_module(module_name), class_name)(url)
+    raise ValueError(f"Unknown job queue backend '{scheme}' in {url}")
+
+
+_queues: Dict[str, JobQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_job_queue(url: str) -> JobQueue:
+    """Return this process's job queue for a URL, creating it on first use."""
+    with _queues_lock:
+        if url not in _queues:
+            _queues[url] = create_job_queue(url)
+        return _queues[url]
+
+
+def wait_for_jobs(queue: JobQueue, job_ids: List[str], poll_interval: float = 0.5,
+                  timeout: Optional[float] = None) -> Iterator[Dict]:
+    """
+    Yield jobs as they reach a final status, in completion order.
+
+    Queue reads run on native threads and the wait between polls is a plain `time.sleep`,
+    which yields to other green threads once eventlet has patched it.
+
+    Raises:
+        TimeoutError: If some jobs are still unfinished after `timeout` seconds.
+    """
+    pending = list(job_ids)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while pending:
+        for job_id in list(pending):
+            job = NativeThreadRunner.run(queue.get, job_id)
+            if job is None or job['status'] in FINAL_STATUSES:
+                pending.remove(job_id)
+                yield job if job is not None else {'job_id': job_id, 'status': 'failed', 'error': "Job not found."}
+        if pending:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"{len(pending)} queued job(s) did not finish within {timeout} seconds.")
+            time.sleep(poll_interval)
@@ -1,8 +1,8 @@
 import os
 import torch
 import numpy as np
-from scipy.io import wavfile
 import whisper
+from utilities.audio_decoder import SAMPLE_RATE, AudioDecoder
 from utilities.file_handler import FileHandler
 import logging
 from flask import current_app, Flask
@@ -47,7 +47,7 @@ class TrainingService:
             try:
                 audio_path = feedback['audio_path']
                 correct_transcript = feedback['correct_transcript']
-                audio_data, rate = wavfile.read(audio_path)
+                audio_data, rate = AudioDecoder.get_instance().decode(audio_path), SAMPLE_RATE
                 mel_spec = self.preprocess_audio(audio_data, rate)
                 loss = self.model.train_on_batch(mel_spec, correct_transcript)
                 logging.info(f"Training loss: {loss}")
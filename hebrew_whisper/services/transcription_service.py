@@ -1,6 +1,9 @@
 from flask import jsonify, request, current_app, send_file
-from models.whisper_model import WhisperModel
+from models.model_pool import WhisperModelPool
+from utilities.native_threads import NativeThreadRunner
 from utilities.text_normalizer import AudioPreprocessor, TextNormalizer
+from utilities.transcript_store import TranscriptStore
+import io
 import os
 
 class TranscriptionService:
@@ -18,24 +21,33 @@ class TranscriptionService:
             return jsonify({"error": "No audio file provided"}), 400
 
         try:
-            preprocessor = AudioPreprocessor('base', current_app.config['TRAINING_DATA_FOLDER'])
+            preprocessor = AudioPreprocessor('base', current_app.config['TRAINING_DATA_FOLDER'],
+                                             spectral_gate=current_app.config.get('SPECTRAL_GATE_ENABLED', False))
             processed_audio, rate = preprocessor.preprocess_audio(temp_path)
 
-            whisper_model = WhisperModel()
-            transcription_result = whisper_model.transcribe(processed_audio, rate)
-
             # Ensure Hebrew language processing if detected or specified
-            language = request.form.get("language", "he")
+            language = request.form.get("language", "he") if request else "he"
+
+            # Borrow the shared model instead of loading a fresh copy for every call
+            model_name = WhisperModelPool.resolve_model_name(current_app.config)
+            with WhisperModelPool.from_config(current_app.config).acquire(model_name) as whisper_model:
+                transcription_result = whisper_model.transcribe(processed_audio, language)
+
             normalized_text = TextNormalizer.normalize_text(transcription_result, language)
 
-            transcript_path = os.path.join(current_app.config['TRANSCRIPT_FOLDER'], f"{os.path.splitext(audio_file.filename)[0]}_transcript.txt")
-            with open(transcript_path, 'w', encoding='utf-8') as f:
-                f.write(normalized_text)
+            store = TranscriptStore.from_config(current_app.config)
+            audio_hash = NativeThreadRunner.run(store.hash_audio, temp_path)
+            job_id = NativeThreadRunner.run(store.put, audio_hash, normalized_text, language=language,
+                                            filename=os.path.basename(temp_path), model_name=model_name)
 
             if request:
                 os.remove(temp_path)
 
-            return send_file(transcript_path, as_attachment=True)
+            base_filename = os.path.splitext(os.path.basename(temp_path))[0]
+            response = send_file(io.BytesIO(normalized_text.encode('utf-8')), mimetype='text/plain; charset=utf-8',
+                                 as_attachment=True, download_name=f"{base_filename}_transcript.txt")
+            response.headers['X-Job-Id'] = job_id
+            return response
         except Exception as e:
             if request:
                 os.remove(temp_path)
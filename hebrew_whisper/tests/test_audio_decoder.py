@@ -0,0 +1,78 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+sf = pytest.importorskip("soundfile")
+pytest.importorskip("scipy")
+
+from scipy.signal import resample_poly  # noqa: E402
+
+from utilities.audio_decoder import SAMPLE_RATE, AudioDecoder, StreamingResampler  # noqa: E402
+
+RATES = [44100, 48000, 22050, 8000, 11025]
+
+
+def noise(samples, channels=None, seed=0):
+    shape = (samples,) if channels is None else (samples, channels)
+    return np.random.default_rng(seed).uniform(-0.5, 0.5, shape).astype(np.float32)
+
+
+def resample_whole(signal, rate):
+    resampler = StreamingResampler(rate)
+    return resample_poly(signal, resampler.up, resampler.down).astype(np.float32)
+
+
+@pytest.mark.parametrize("rate", RATES)
+@pytest.mark.parametrize("block", [997, 4099])
+def test_streaming_resampler_matches_whole_signal(rate, block):
+    signal = noise(int(rate * 2.3))
+    resampler = StreamingResampler(rate)
+    pieces = [
+        resampler.process(signal[start:start + block], final=start + block >= len(signal))
+        for start in range(0, len(signal), block)
+    ]
+
+    expected = resample_whole(signal, rate)
+    streamed = np.concatenate(pieces)
+    assert len(streamed) == len(expected)
+    np.testing.assert_allclose(streamed, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (b"RIFF\x24\x00\x00\x00WAVEfmt ", 'wav'),
+    (b"RF64\xff\xff\xff\xffWAVEds64", 'wav'),
+    (b"fLaC\x00\x00\x00\x22", 'flac'),
+    (b"OggS\x00\x02\x00\x00", 'ogg'),
+    (b"\x00\x00\x00\x20ftypisom", 'mp4'),
+    (b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81", 'webm'),
+    (b"ID3\x04\x00\x00\x00\x00", 'mp3'),
+    (b"\xff\xfb\x90\x64\x00\x00", 'mp3'),
+    (b"\xff\xf1\x50\x80\x02\x1f", 'aac'),
+    (b"RIFF\x24\x00\x00\x00AVI LIST", None),
+    (b"hello world", None),
+    (b"", None),
+])
+def test_sniff_format(header, expected):
+    assert AudioDecoder.sniff_format(header) == expected
+
+
+def test_decode_wav_downmixes_and_resamples(tmp_path):
+    path = str(tmp_path / "stereo.wav")
+    stereo = noise(44100 * 3 + 123, channels=2)
+    sf.write(path, stereo, 44100, subtype='FLOAT')
+
+    decoded = AudioDecoder(block_seconds=0.7).decode(path)
+
+    expected = resample_whole(stereo.mean(axis=1), 44100)
+    assert decoded.dtype == np.float32
+    assert len(decoded) == len(expected)
+    np.testing.assert_allclose(decoded, expected, atol=1e-5)
+
+
+def test_decode_flac_at_the_target_rate_round_trips(tmp_path):
+    path = str(tmp_path / "mono.flac")
+    sf.write(path, noise(SAMPLE_RATE * 2 + 7), SAMPLE_RATE, subtype='PCM_16')
+
+    decoded = AudioDecoder(block_seconds=0.5).decode(path)
+
+    expected, _ = sf.read(path, dtype='float32')
+    np.testing.assert_array_equal(decoded, expected)
@@ -0,0 +1,75 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from scipy.signal import sosfilt  # noqa: E402
+
+from utilities.audio_filters import SpectralGate, StreamingFilter, bandpass_sos  # noqa: E402
+
+RATES = [44100, 48000, 22050, 8000, 11025]
+
+
+def noisy_tone(samples, rate, channels=None, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(samples) / rate
+    signal = 0.3 * np.sin(2 * np.pi * 440 * t) * (t % 1.0 < 0.5) + rng.normal(0, 0.02, samples)
+    if channels is not None:
+        signal = np.stack([signal * (c + 1) / channels for c in range(channels)], axis=1)
+    return signal.astype(np.float32)
+
+
+def in_blocks(process, signal, block, flush=False):
+    pieces = []
+    for start in range(0, len(signal), block):
+        chunk = signal[start:start + block]
+        if flush:
+            pieces.append(process(chunk, final=start + block >= len(signal)))
+        else:
+            pieces.append(process(chunk))
+    return np.concatenate(pieces)
+
+
+@pytest.mark.parametrize("rate", RATES)
+@pytest.mark.parametrize("channels", [None, 2])
+def test_streaming_filter_matches_whole_signal(rate, channels):
+    sos = bandpass_sos(rate)
+    signal = noisy_tone(int(rate * 1.7), rate, channels)
+
+    streamed = in_blocks(StreamingFilter(sos).process, signal, 1021)
+
+    expected = sosfilt(sos, signal, axis=0)
+    assert streamed.shape == signal.shape
+    np.testing.assert_allclose(streamed, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize("rate", RATES)
+@pytest.mark.parametrize("block", [333, 4097])
+def test_spectral_gate_blocks_match_one_shot(rate, block):
+    signal = noisy_tone(int(rate * 2.1) + 5, rate)
+
+    whole = SpectralGate(rate).process(signal, final=True)
+    streamed = in_blocks(SpectralGate(rate).process, signal, block, flush=True)
+
+    assert len(whole) == len(signal)
+    assert len(streamed) == len(signal)
+    assert streamed.dtype == signal.dtype
+    np.testing.assert_allclose(streamed, whole, atol=1e-5)
+
+
+def test_spectral_gate_keeps_channels_and_length():
+    rate = 22050
+    signal = noisy_tone(rate + 11, rate, channels=2)
+
+    streamed = in_blocks(SpectralGate(rate).process, signal, 999, flush=True)
+
+    assert streamed.shape == signal.shape
+
+
+def test_spectral_gate_with_zero_threshold_reconstructs_input():
+    rate = 8000
+    signal = noisy_tone(rate * 2 + 3, rate)
+
+    streamed = in_blocks(SpectralGate(rate, threshold=0).process, signal, 777, flush=True)
+
+    np.testing.assert_allclose(streamed, signal, atol=1e-5)
@@ -0,0 +1,155 @@
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.batch_transcription_service import BatchTranscriptionService
+from utilities.transcript_store import TranscriptStore
+
+
+class Upload:
+    """Minimal stand-in for a Werkzeug `FileStorage`."""
+
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.stream = io.BytesIO(data)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.stream.getvalue())
+
+
+class StubPool:
+    """Pool whose transcription of a file takes as many seconds as the file's content says."""
+
+    def __init__(self, workers=4):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def transcribe_result(self, path, language, model_name):
+        with open(path) as f:
+            content = f.read()
+        if content == 'fail':
+            raise RuntimeError("model failed")
+        with self.lock:
+            self.calls.append(os.path.basename(path))
+        time.sleep(float(content))
+        return {'text': f"text of {content}", 'segments': [{'text': content}], 'inference_seconds': float(content)}
+
+
+def zipped(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TranscriptStore(str(tmp_path / "transcripts.sqlite3"))
+
+
+def make_service(tmp_path, store=None, pool=None, **kwargs):
+    return BatchTranscriptionService(pool=pool, store=store, uploads_dir=str(tmp_path / "uploads"), **kwargs)
+
+
+def test_stage_uploads_keeps_only_the_basename_of_zip_members(tmp_path):
+    service = make_service(tmp_path)
+    archive = zipped({"../../evil.wav": b"x", "nested/dir/b.wav": b"y", "notes.txt": b"z", "nested/": b""})
+
+    staged = service.stage_uploads([Upload("a.wav", b"a"), Upload("set.zip", archive)])
+
+    assert [name for name, _ in staged] == ["a.wav", "../../evil.wav", "nested/dir/b.wav"]
+    assert [os.path.basename(path) for _, path in staged] == ["0000_a.wav", "0001_evil.wav", "0002_b.wav"]
+    assert all(os.path.dirname(path) == service.batch_dir for _, path in staged)
+    assert service.staged_bytes == 3
+
+
+def test_stage_uploads_enforces_the_per_file_cap(tmp_path):
+    service = make_service(tmp_path, max_file_bytes=4)
+    service.stage_uploads([Upload("a.wav", b"1234")])
+
+    with pytest.raises(ValueError, match="per file"):
+        service.stage_uploads([Upload("b.wav", b"12345")])
+    with pytest.raises(ValueError, match="per file"):
+        service.stage_uploads([Upload("set.zip", zipped({"c.wav": b"12345"}))])
+
+
+def test_stage_uploads_enforces_the_per_batch_cap(tmp_path):
+    service = make_service(tmp_path, max_file_bytes=4, max_batch_bytes=10)
+
+    with pytest.raises(ValueError, match="Batch exceeds the limit of 10 bytes"):
+        service.stage_uploads([Upload("a.wav", b"1234"), Upload("set.zip", zipped({"b.wav": b"1234", "c.wav": b"1234"}))])
+
+
+def test_stage_uploads_enforces_the_file_count_cap(tmp_path):
+    service = make_service(tmp_path, max_files=2)
+
+    with pytest.raises(ValueError, match="limit of 2 files"):
+        service.stage_uploads([Upload("set.zip", zipped({f"{i}.wav": b"x" for i in range(3)}))])
+    with pytest.raises(ValueError, match="limit of 2 files"):
+        make_service(tmp_path, max_files=2).stage_uploads([Upload(f"{i}.wav", b"x") for i in range(3)])
+
+
+def test_stage_uploads_rejects_a_bad_zip(tmp_path):
+    with pytest.raises(ValueError, match="Invalid zip archive 'broken.zip'"):
+        make_service(tmp_path).stage_uploads([Upload("broken.zip", b"not a zip")])
+
+
+def test_clean_up_removes_the_staging_directory(tmp_path):
+    service = make_service(tmp_path)
+    service.stage_uploads([Upload("a.wav", b"a")])
+
+    service.clean_up()
+
+    assert not os.path.exists(service.batch_dir)
+
+
+def test_stream_results_yields_ndjson_in_completion_order(tmp_path, store):
+    pool = StubPool()
+    service = make_service(tmp_path, store=store, pool=pool, model_name='small')
+    staged = service.stage_uploads([Upload("slow.wav", b"0.3"), Upload("bad.wav", b"fail"),
+                                    Upload("fast.wav", b"0.05")])
+
+    lines = list(service.stream_results(staged, language='he'))
+
+    assert all(line.endswith("\n") for line in lines)
+    results = [json.loads(line) for line in lines]
+    assert [r['filename'] for r in results] == ["bad.wav", "fast.wav", "slow.wav"]
+    assert [r['index'] for r in results] == [1, 2, 0]
+    for result in results:
+        assert set(result) == {'index', 'batch_id', 'job_id', 'filename', 'status', 'transcription', 'error', 'timing'}
+        assert set(result['timing']) == {'queued_seconds', 'transcribe_seconds', 'total_seconds'}
+        assert result['batch_id'] == service.batch_id
+
+    bad, fast, slow = results
+    assert (bad['status'], bad['error'], bad['job_id']) == ("error", "model failed", None)
+    assert (slow['status'], slow['transcription'], slow['timing']['transcribe_seconds']) == ("ok", "text of 0.3", 0.3)
+    record = store.get(slow['job_id'])
+    assert (record['filename'], record['model_name'], record['metadata']) == \
+        ("slow.wav", 'small', {'batch_id': service.batch_id})
+    assert not os.path.exists(service.batch_dir)
+
+
+def test_stream_results_answers_repeated_audio_from_the_store(tmp_path, store):
+    pool = StubPool()
+    first = make_service(tmp_path, store=store, pool=pool)
+    original = json.loads(next(first.stream_results(first.stage_uploads([Upload("a.wav", b"0.01")]))))
+
+    again = make_service(tmp_path, store=store, pool=pool)
+    repeated = json.loads(next(again.stream_results(again.stage_uploads([Upload("copy.wav", b"0.01")]))))
+
+    assert len(pool.calls) == 1
+    assert repeated['job_id'] == original['job_id']
+    assert repeated['transcription'] == "text of 0.01"
+    assert repeated['timing']['transcribe_seconds'] == 0.0
@@ -0,0 +1,142 @@
+import time
+
+import pytest
+
+from services.job_queue import SQLiteJobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def enqueue(queue, name="a.wav", max_attempts=3):
+    return queue.enqueue({'file_path': name}, origin="web-1", sid="sid-1", max_attempts=max_attempts)
+
+
+def events(queue):
+    return [(event['job_id'], event['event']) for event in queue.poll_events("web-1")]
+
+
+def test_claim_hands_out_each_job_once_in_order(queue):
+    first, second = enqueue(queue, "a.wav"), enqueue(queue, "b.wav")
+
+    job = queue.claim("worker-1", lease_seconds=60)
+    assert job['job_id'] == first
+    assert job['payload'] == {'file_path': "a.wav"}
+    assert (job['status'], job['worker_id'], job['attempts']) == ('running', "worker-1", 1)
+
+    assert queue.claim("worker-2", lease_seconds=60)['job_id'] == second
+    assert queue.claim("worker-3", lease_seconds=60) is None
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(queue):
+    job_id = enqueue(queue)
+    queue.claim("worker-1", lease_seconds=0.01)
+    time.sleep(0.05)
+
+    reclaimed = queue.claim("worker-2", lease_seconds=60)
+    assert reclaimed['job_id'] == job_id
+    assert (reclaimed['worker_id'], reclaimed['attempts']) == ("worker-2", 2)
+
+
+def test_heartbeat_keeps_the_lease(queue):
+    job_id = enqueue(queue)
+    queue.claim("worker-1", lease_seconds=0.2)
+    time.sleep(0.1)
+    assert queue.heartbeat(job_id, "worker-1", lease_seconds=60)
+    time.sleep(0.15)
+
+    assert queue.claim("worker-2", lease_seconds=60) is None
+    assert not queue.heartbeat(job_id, "worker-2", lease_seconds=60)
+
+
+def test_complete_is_rejected_from_a_stale_worker(queue):
+    job_id = enqueue(queue)
+    queue.claim("worker-1", lease_seconds=0.01)
+    time.sleep(0.05)
+    queue.claim("worker-2", lease_seconds=60)
+
+    assert not queue.complete(job_id, "worker-1", {'transcription': "stale"})
+    assert queue.complete(job_id, "worker-2", {'transcription': "fresh"})
+
+    job = queue.get(job_id)
+    assert job['status'] == 'done'
+    assert job['result'] == {'transcription': "fresh"}
+    assert events(queue) == [(job_id, 'transcription_complete')]
+
+
+def test_failed_attempt_is_retried_after_a_delay(queue):
+    job_id = enqueue(queue)
+    queue.claim("worker-1", lease_seconds=60)
+
+    assert queue.fail(job_id, "worker-1", "boom", retry_delay=60)
+    assert queue.get(job_id)['status'] == 'queued'
+    assert queue.claim("worker-2", lease_seconds=60) is None  # Still backing off
+    assert events(queue) == [(job_id, 'log_message')]
+
+
+def test_failure_on_the_final_attempt_fails_the_job(queue):
+    job_id = enqueue(queue, max_attempts=2)
+    queue.claim("worker-1", lease_seconds=60)
+    queue.fail(job_id, "worker-1", "first", retry_delay=0)
+    queue.claim("worker-1", lease_seconds=60)
+
+    assert queue.fail(job_id, "worker-1", "second", retry_delay=0)
+
+    job = queue.get(job_id)
+    assert (job['status'], job['error']) == ('failed', "second")
+    assert queue.claim("worker-1", lease_seconds=60) is None
+    relayed = queue.poll_events("web-1")
+    assert [event['event'] for event in relayed] == ['log_message', 'error']
+    assert relayed[-1]['data'] == {'error': "second", 'job_id': job_id}
+    assert relayed[-1]['sid'] == "sid-1"
+
+
+def test_expired_lease_on_the_final_attempt_fails_the_job(queue):
+    job_id = enqueue(queue, max_attempts=1)
+    queue.claim("worker-1", lease_seconds=0.01)
+    time.sleep(0.05)
+
+    assert queue.claim("worker-2", lease_seconds=60) is None
+    assert queue.get(job_id)['status'] == 'failed'
+    assert events(queue) == [(job_id, 'error')]
+
+
+def test_only_queued_jobs_can_be_cancelled(queue):
+    running, queued = enqueue(queue, "a.wav"), enqueue(queue, "b.wav")
+    queue.claim("worker-1", lease_seconds=60)
+
+    assert not queue.cancel(running)
+    assert queue.cancel(queued)
+    assert queue.get(queued)['status'] == 'cancelled'
+    assert queue.claim("worker-2", lease_seconds=60) is None
+
+
+def test_events_are_polled_per_origin_after_an_id(queue):
+    job_id = enqueue(queue)
+    other = queue.enqueue({'file_path': "b.wav"}, origin="web-2")
+    for claimed in (job_id, other):
+        assert queue.claim("worker-1", lease_seconds=60)['job_id'] == claimed
+        queue.report_progress(claimed, "worker-1", {'progress': 0})
+
+    first = queue.poll_events("web-1")
+    assert [event['job_id'] for event in first] == [job_id]
+    assert queue.poll_events("web-1", after_id=first[-1]['id']) == []
+    assert queue.purge_events(older_than_seconds=-1) == 2
+
+
+def test_purge_removes_finished_jobs_past_retention(queue):
+    done, failed, running, cancelled, queued = (enqueue(queue, f"{i}.wav", max_attempts=1) for i in range(5))
+    for job_id in (done, failed, running):
+        assert queue.claim("worker-1", lease_seconds=60)['job_id'] == job_id
+    queue.complete(done, "worker-1", {'transcription': "x"})
+    queue.fail(failed, "worker-1", "boom")
+    queue.cancel(cancelled)
+
+    assert queue.purge_events(older_than_seconds=3600) == 0
+    assert queue.purge_events(older_than_seconds=-1) == 2 + 3
+
+    assert [queue.get(job_id) for job_id in (done, failed, cancelled)] == [None, None, None]
+    assert queue.get(running)['status'] == 'running'
+    assert queue.get(queued)['status'] == 'queued'
@@ -0,0 +1,132 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from models import memory_manager  # noqa: E402
+from models.memory_manager import MB, ModelMemoryManager  # noqa: E402
+
+
+class FakeModel:
+    """Model whose weights occupy `size_mb` of the simulated process memory."""
+
+    def __init__(self, name, size_mb, usage):
+        self.name = name
+        self.size = size_mb * MB
+        self.usage = usage
+        self.model = torch.nn.Linear(size_mb * MB // 4, 1, bias=False)  # size_mb of float32 weights
+        usage['rss'] += self.size
+
+    def clean_up(self):
+        self.usage['rss'] -= self.size
+
+
+@pytest.fixture
+def usage():
+    return {'rss': 10 * MB}
+
+
+def make_manager(usage, sizes, loads, **kwargs):
+    def loader(name):
+        loads.append(name)
+        return FakeModel(name, sizes[name], usage)
+
+    manager = ModelMemoryManager(loader, **kwargs)
+    manager.rss_bytes = lambda: usage['rss']
+    manager.device_bytes = lambda: 0
+    return manager
+
+
+def loaded(manager):
+    return [model['name'] for model in manager.report()['models'] if model['loaded']]
+
+
+def test_released_model_stays_loaded_when_over_budget(usage):
+    loads = []
+    manager = make_manager(usage, {'medium': 4}, loads, memory_budget_mb=5)
+
+    for _ in range(3):
+        with manager.acquire('medium') as model:
+            assert model.name == 'medium'
+
+    assert loads == ['medium']
+    assert loaded(manager) == ['medium']
+
+
+def test_least_recently_used_model_is_evicted_before_a_load(usage, monkeypatch):
+    monkeypatch.setitem(memory_manager.FOOTPRINT_ESTIMATES_MB, 'c', 4)  # First load of 'c' uses the estimate
+    loads = []
+    manager = make_manager(usage, {'a': 4, 'b': 4, 'c': 4}, loads, memory_budget_mb=20)
+    for name in ('a', 'b', 'a'):
+        with manager.acquire(name):
+            pass
+    assert usage['rss'] == 18 * MB
+
+    with manager.acquire('c'):
+        assert usage['rss'] <= 20 * MB  # 'b' made room before 'c' was loaded, not after
+
+    assert loaded(manager) == ['c', 'a']
+    assert loads == ['a', 'b', 'c']
+
+
+def test_known_footprint_is_used_for_a_reload(usage):
+    loads = []
+    manager = make_manager(usage, {'a': 4, 'b': 8}, loads, memory_budget_mb=20)
+    with manager.acquire('b'):
+        pass
+    manager.unload_idle(idle_seconds=-1)
+    with manager.acquire('a'):
+        pass
+    assert manager.expected_footprint('b') == 8 * MB
+
+    with manager.acquire('b'):
+        pass
+
+    assert loaded(manager) == ['b']  # 10 + 4 + 8 > 20, so 'a' went first
+
+
+def test_models_in_use_are_never_evicted(usage):
+    loads = []
+    manager = make_manager(usage, {'a': 4, 'b': 4}, loads, memory_budget_mb=12)
+
+    with manager.acquire('a'):
+        with manager.acquire('b'):
+            assert loaded(manager) == ['b', 'a']  # Over budget, but both are busy
+        assert loaded(manager) == ['b', 'a']  # 'a' is still busy and 'b' was just released
+
+    assert loaded(manager) == ['a']
+
+
+def test_unload_idle_skips_recent_and_busy_models(usage):
+    loads = []
+    manager = make_manager(usage, {'a': 1, 'b': 1}, loads, idle_seconds=60)
+    with manager.acquire('a'):
+        pass
+
+    with manager.acquire('b'):
+        assert manager.unload_idle() == 0
+        assert manager.unload_idle(idle_seconds=-1) == 1
+
+    assert loaded(manager) == ['b']
+
+
+def test_failed_load_is_forgotten(usage):
+    def loader(name):
+        raise RuntimeError("no weights")
+
+    manager = ModelMemoryManager(loader)
+    with pytest.raises(RuntimeError):
+        with manager.acquire('missing'):
+            pass
+
+    assert manager.report()['models'] == []
+
+
+def test_expected_footprint_of_unloaded_models(tmp_path):
+    manager = ModelMemoryManager(loader=None)
+    checkpoint = tmp_path / "fine_tuned.pt"
+    checkpoint.write_bytes(b"\0" * 1234)
+
+    assert manager.expected_footprint(str(checkpoint)) == 1234
+    assert manager.expected_footprint('large-v3') == manager.expected_footprint('large') > 0
+    assert manager.expected_footprint('base.en') == manager.expected_footprint('base')
+    assert manager.expected_footprint('unknown') == 0
@@ -0,0 +1,142 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+pytest.importorskip("soundfile")
+pytest.importorskip("scipy")
+
+from models.parallel_transcriber import ParallelTranscriber  # noqa: E402
+from utilities.audio_decoder import SAMPLE_RATE  # noqa: E402
+
+
+def speech_with_pauses(seconds, pauses):
+    """Noise standing in for speech, silent for half a second at each pause."""
+    audio = np.random.default_rng(0).normal(0, 0.1, int(seconds * SAMPLE_RATE)).astype(np.float32)
+    for pause in pauses:
+        start = int(pause * SAMPLE_RATE)
+        audio[start:start + SAMPLE_RATE // 2] = 0
+    return audio
+
+
+def test_split_points_cut_at_pauses_near_even_targets():
+    audio = speech_with_pauses(300, pauses=[98.0, 203.0])
+    bounds = ParallelTranscriber(workers=3, min_chunk=60).split_points(audio)
+
+    assert len(bounds) == 3
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(audio)
+    assert all(end == start for (_, end), (start, _) in zip(bounds, bounds[1:]))
+    for (_, split), pause in zip(bounds, (98.0, 203.0)):
+        assert pause <= split / SAMPLE_RATE < pause + 0.5
+
+
+def test_split_points_keep_chunks_above_the_minimum_length():
+    audio = speech_with_pauses(150, pauses=[])
+
+    assert len(ParallelTranscriber(workers=8, min_chunk=60).split_points(audio)) == 2
+    assert ParallelTranscriber(workers=8, min_chunk=200).split_points(audio) == [(0, len(audio))]
+    assert ParallelTranscriber(workers=1, min_chunk=60).split_points(audio) == [(0, len(audio))]
+
+
+def test_stitch_keeps_overlap_segments_once():
+    bounds = [(0, 10 * SAMPLE_RATE), (10 * SAMPLE_RATE, 20 * SAMPLE_RATE)]
+    chunk_segments = [
+        [
+            {'start': 0.0, 'end': 5.0, 'text': " one"},
+            {'start': 5.0, 'end': 9.8, 'text': " two"},
+            {'start': 9.8, 'end': 11.0, 'text': " three"},  # Decoded in the overlap; midpoint in chunk 1
+        ],
+        [
+            {'start': 9.0, 'end': 9.8, 'text': " two"},  # Midpoint in chunk 0
+            {'start': 9.8, 'end': 11.0, 'text': " three"},
+            {'start': 11.0, 'end': 15.0, 'text': " four"},
+        ],
+    ]
+
+    segments = ParallelTranscriber.stitch(chunk_segments, bounds)
+
+    assert [seg['text'] for seg in segments] == [" one", " two", " three", " four"]
+    assert [seg['start'] for seg in segments] == sorted(seg['start'] for seg in segments)
+
+
+def test_stitch_collapses_repeated_text_across_a_boundary():
+    bounds = [(0, 10 * SAMPLE_RATE), (10 * SAMPLE_RATE, 20 * SAMPLE_RATE)]
+    chunk_segments = [
+        [{'start': 8.0, 'end': 10.4, 'text': " shalom"}],
+        [{'start': 10.1, 'end': 11.0, 'text': "shalom "}, {'start': 11.0, 'end': 12.0, 'text': " olam"}],
+    ]
+
+    segments = ParallelTranscriber.stitch(chunk_segments, bounds)
+
+    assert [seg['text'].strip() for seg in segments] == ["shalom", "olam"]
+
+
+class SparseBufferModel(torch.nn.Module):
+    """Module with a sparse buffer, like Whisper's `alignment_heads`, standing in for a model."""
+
+    def __init__(self):
+        super().__init__()
+        self.weight = torch.nn.Parameter(torch.ones(4))
+        self.register_buffer("heads", torch.eye(4).to_sparse(), persistent=False)
+
+    def transcribe(self, audio, language=None, **options):
+        # Weights and the sparse buffer as the worker sees them, and the chunk length
+        text = f" {int(self.weight.sum())}:{int(self.heads.to_dense().sum())}:{round(len(audio) / SAMPLE_RATE)}"
+        return {'segments': [{'start': 0.0, 'end': len(audio) / SAMPLE_RATE, 'text': text}]}
+
+
+class ModelWrapper:
+    """The attributes of `WhisperModel` that `ParallelTranscriber` reads."""
+
+    def __init__(self, model):
+        self.model = model
+        self.device = torch.device("cpu")
+        self.beam_size = 1
+        self.temperature = 0.0
+
+    def transcribe_result(self, audio, language="he"):
+        segments = self.model.transcribe(audio, language)['segments']
+        return {'text': ''.join(seg['text'] for seg in segments), 'segments': segments, 'language': language}
+
+
+def test_transcribe_result_decodes_chunks_in_worker_processes(tmp_path):
+    import soundfile as sf
+
+    path = str(tmp_path / "long.wav")
+    sf.write(path, speech_with_pauses(150, pauses=[74.0]), SAMPLE_RATE)
+    transcriber = ParallelTranscriber(workers=2, min_duration=120, min_chunk=60)
+    try:
+        result = transcriber.transcribe_result(ModelWrapper(SparseBufferModel()), path, "he")
+    finally:
+        transcriber.close()
+
+    assert [seg['text'] for seg in result['segments']] == [" 4:4:75", " 4:4:77"]
+    assert result['text'] == " 4:4:75 4:4:77"
+    assert result['segments'][1]['start'] > 60
+
+
+def test_transcribe_result_completes_under_eventlet(tmp_path):
+    pytest.importorskip("eventlet")
+    import soundfile as sf
+
+    path = str(tmp_path / "long.wav")
+    sf.write(path, speech_with_pauses(150, pauses=[74.0]), SAMPLE_RATE)
+    # Monkey patching cannot be undone, so the server-like process runs separately
+    script = textwrap.dedent(f"""
+        import eventlet
+        eventlet.monkey_patch()
+        from models.parallel_transcriber import ParallelTranscriber
+        from tests.test_parallel_transcriber import ModelWrapper, SparseBufferModel
+        transcriber = ParallelTranscriber(workers=2, min_duration=120, min_chunk=60)
+        print(transcriber.transcribe_result(ModelWrapper(SparseBufferModel()), {path!r}, "he")['text'])
+    """)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True,
+                               timeout=120, env=dict(os.environ, PYTHONPATH=root))
+
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == "4:4:150"  # One in-process pass over the whole file
@@ -0,0 +1,63 @@
+import hashlib
+import json
+import zlib
+
+import pytest
+
+from utilities import transcript_store
+from utilities.transcript_store import TranscriptStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TranscriptStore(str(tmp_path / "transcripts.sqlite3"))
+
+
+SEGMENTS = [{'start': 0.0, 'end': 1.5, 'text': "שלום"}, {'start': 1.5, 'end': 3.0, 'text': "עולם"}]
+
+
+def test_put_and_get_round_trip(store):
+    job_id = store.put("abc", "שלום עולם", segments=SEGMENTS, timing={'transcribe_seconds': 1.2},
+                       metadata={'batch_id': "b1"}, filename="a.wav", language='he', model_name='small')
+
+    record = store.get(job_id)
+    assert record['job_id'] == job_id
+    assert (record['audio_hash'], record['filename'], record['language'], record['model_name']) == \
+        ("abc", "a.wav", 'he', 'small')
+    assert record['text'] == "שלום עולם"
+    assert record['segments'] == SEGMENTS
+    assert record['timing'] == {'transcribe_seconds': 1.2}
+    assert record['metadata'] == {'batch_id': "b1"}
+    assert store.get("missing") is None
+
+
+def test_text_and_segments_are_stored_compressed(store):
+    text = "שלום עולם " * 200
+    job_id = store.put("abc", text, segments=SEGMENTS, job_id="job-1")
+
+    raw_text, raw_segments = store._connection().execute(
+        "SELECT text, segments FROM transcripts WHERE job_id = ?", (job_id,)).fetchone()
+    assert len(raw_text) < len(text.encode('utf-8'))
+    assert zlib.decompress(raw_text).decode('utf-8') == text
+    assert json.loads(zlib.decompress(raw_segments)) == SEGMENTS
+
+
+def test_find_by_audio_matches_language_and_model_and_prefers_the_latest(store, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(transcript_store.time, 'time', lambda: next(clock))
+    older = store.put("abc", "first", language='he', model_name='small')
+    newer = store.put("abc", "second", language='he', model_name='small')
+    store.put("abc", "other model", language='he', model_name='medium')
+
+    assert store.find_by_audio("abc", 'he', 'small')['job_id'] == newer != older
+    assert store.find_by_audio("abc", 'he', 'medium')['text'] == "other model"
+    assert store.find_by_audio("abc", 'en', 'small') is None
+    assert store.find_by_audio("xyz", 'he', 'small') is None
+
+
+def test_hash_audio_reads_in_chunks(tmp_path):
+    path = tmp_path / "a.wav"
+    data = bytes(range(256)) * 1000
+    path.write_bytes(data)
+
+    assert TranscriptStore.hash_audio(str(path), chunk_size=4096) == hashlib.sha256(data).hexdigest()
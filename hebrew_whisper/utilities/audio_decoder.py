@@ -0,0 +1,299 @@
+import atexit
+import logging
+import math
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import deque
+from typing import Iterator, Optional
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+from utilities.native_threads import NativeThreadRunner
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SAMPLE_RATE = 16000  # Whisper's input rate
+
+
+class StreamingResampler:
+    """
+    Polyphase resampler that converts a stream block by block.
+
+    Each block is resampled together with enough neighbouring input to cover the
+    filter's support, and only the part of the output owned by the block is emitted,
+    so the concatenated output matches resampling the whole signal at once.
+    """
+
+    def __init__(self, orig_rate: int, target_rate: int = SAMPLE_RATE):
+        g = math.gcd(orig_rate, target_rate)
+        self.up, self.down = target_rate // g, orig_rate // g
+        # resample_poly's default filter spans 10 * max(up, down) taps either side in the upsampled domain
+        support = math.ceil(10 * max(self.up, self.down) / self.up) + 1
+        self.pad = self.down * math.ceil(support / self.down)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0  # Input index of self._buffer[0]
+        self._next = 0  # Input index where the next emitted output starts; a multiple of `down`
+
+    def process(self, block: np.ndarray, final: bool = False) -> np.ndarray:
+        """
+        Feed a block of input and return the output that is now fully determined.
+
+        Args:
+            block (np.ndarray): Mono input samples.
+            final (bool): True for the last block; flushes the remaining output.
+
+        Returns:
+            np.ndarray: Resampled float32 samples.
+        """
+        self._buffer = np.concatenate([self._buffer, block.astype(np.float32, copy=False)])
+        end = self._buffer_start + len(self._buffer)
+        stop = end if final else ((end - self.pad) // self.down) * self.down
+        if stop <= self._next:
+            return np.zeros(0, dtype=np.float32)
+
+        lo = max(self._next - self.pad, 0)
+        hi = end if final else stop + self.pad
+        resampled = resample_poly(self._buffer[lo - self._buffer_start:hi - self._buffer_start], self.up, self.down)
+        offset = (self._next - lo) * self.up // self.down
+        count = math.ceil((stop - self._next) * self.up / self.down)
+        out = resampled[offset:offset + count].astype(np.float32, copy=False)
+
+        self._next = stop
+        keep_from = max(stop - self.pad, 0)
+        self._buffer = self._buffer[keep_from - self._buffer_start:]
+        self._buffer_start = keep_from
+        return out
+
+
+class FfmpegPipePool:
+    """
+    Pool of pre-started ffmpeg processes reading from stdin.
+
+    An ffmpeg process can only decode one input, so each process is used once; the pool
+    keeps `size` processes started ahead of time so a decode never waits for process
+    start-up, and replaces each one as it is handed out.
+    """
+
+    def __init__(self, size: int = 2, sample_rate: int = SAMPLE_RATE):
+        self.size = size
+        self.sample_rate = sample_rate
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._closed = False
+        atexit.register(self.close)
+
+    def _command(self, source: str = 'pipe:0') -> list:
+        command = ['ffmpeg', '-hide_banner', '-loglevel', 'error']
+        if source != 'pipe:0':
+            command.append('-nostdin')
+        return command + ['-threads', '0', '-i', source,
+                          '-f', 'f32le', '-ac', '1', '-ar', str(self.sample_rate), 'pipe:1']
+
+    def _spawn(self, source: str = 'pipe:0') -> subprocess.Popen:
+        # stderr goes to a temporary file so a chatty decoder can never block on a full pipe
+        stderr = tempfile.TemporaryFile()
+        try:
+            process = subprocess.Popen(
+                self._command(source),
+                stdin=subprocess.PIPE if source == 'pipe:0' else subprocess.DEVNULL,
+                stdout=subprocess.PIPE, stderr=stderr
+            )
+        except FileNotFoundError as e:
+            stderr.close()
+            raise RuntimeError("ffmpeg is required to decode compressed audio but was not found.") from e
+        process.stderr_file = stderr
+        return process
+
+    @staticmethod
+    def _stderr_text(process: subprocess.Popen) -> str:
+        process.stderr_file.seek(0)
+        return process.stderr_file.read().decode('utf-8', errors='replace').strip()
+
+    def _refill(self) -> None:
+        with self._lock:
+            while not self._closed and len(self._idle) < self.size:
+                self._idle.append(self._spawn())
+
+    def _take(self) -> subprocess.Popen:
+        with self._lock:
+            process = self._idle.popleft() if self._idle else None
+        if process is None or process.poll() is not None:
+            if process is not None:
+                process.stderr_file.close()
+            process = self._spawn()
+        threading.Thread(target=self._refill, daemon=True).start()
+        return process
+
+    @staticmethod
+    def _feed(process: subprocess.Popen, path: str) -> None:
+        """Copy the file into ffmpeg's stdin; runs on its own thread to avoid pipe deadlock."""
+        try:
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, process.stdin, 1 << 16)
+        except (BrokenPipeError, OSError):
+            pass  # ffmpeg stopped reading; its exit status reports the reason
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    def stream(self, path: str, block_samples: int, seekable: bool = False) -> Iterator[np.ndarray]:
+        """
+        Decode a file to 16 kHz mono float32 blocks.
+
+        Args:
+            path (str): Path to the audio file.
+            block_samples (int): Samples per emitted block.
+            seekable (bool): Give ffmpeg the path instead of a pipe; needed by containers such
+                as MP4 whose index may sit at the end of the file.
+        """
+        process = self._spawn(path) if seekable else self._take()
+        feeder = None
+        if not seekable:
+            feeder = threading.Thread(target=self._feed, args=(process, path), daemon=True)
+            feeder.start()
+        try:
+            block_bytes = block_samples * 4
+            while True:
+                data = process.stdout.read(block_bytes)
+                if not data:
+                    break
+                usable = len(data) - len(data) % 4
+                yield np.frombuffer(data[:usable], dtype=np.float32)
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed to decode {path}: {self._stderr_text(process)}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            process.stderr_file.close()
+            if feeder is not None:
+                feeder.join(timeout=1)
+
+    def close(self) -> None:
+        """Stop every idle process."""
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                process = self._idle.popleft()
+                process.kill()
+                process.wait()
+                process.stderr_file.close()
+
+
+class AudioDecoder:
+    """
+    Single entry point for turning audio files into 16 kHz mono float32 samples.
+
+    The container is sniffed from the header bytes: WAV and FLAC are read in-process with
+    soundfile, anything else is decoded through a pool of ffmpeg pipes. Output is
+    produced as a stream of blocks so callers can process long files incrementally.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    IN_PROCESS_FORMATS = ('wav', 'flac')
+    SEEKABLE_FORMATS = ('mp4',)
+
+    def __init__(self, block_seconds: float = 30.0, ffmpeg_pool_size: int = 2):
+        """
+        Args:
+            block_seconds (float): Length of emitted blocks in seconds.
+            ffmpeg_pool_size (int): ffmpeg processes kept started ahead of time.
+        """
+        self.block_samples = int(block_seconds * SAMPLE_RATE)
+        self.ffmpeg = FfmpegPipePool(size=ffmpeg_pool_size)
+
+    @classmethod
+    def get_instance(cls) -> "AudioDecoder":
+        """Return the shared decoder, creating it on first use."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @staticmethod
+    def sniff_format(header: bytes) -> Optional[str]:
+        """
+        Identify an audio container from its first bytes.
+
+        Returns:
+            str: One of 'wav', 'flac', 'ogg', 'mp3', 'aac', 'mp4', 'webm', or None if unknown.
+        """
+        if header[:4] in (b'RIFF', b'RF64') and header[8:12] == b'WAVE':
+            return 'wav'
+        if header[:4] == b'fLaC':
+            return 'flac'
+        if header[:4] == b'OggS':
+            return 'ogg'
+        if header[4:8] == b'ftyp':
+            return 'mp4'
+        if header[:4] == b'\x1a\x45\xdf\xa3':
+            return 'webm'
+        if header[:3] == b'ID3':
+            return 'mp3'
+        if len(header) >= 2 and header[0] == 0xFF:
+            if header[1] & 0xF6 == 0xF0:
+                return 'aac'  # ADTS
+            if header[1] & 0xE0 == 0xE0:
+                return 'mp3'  # MPEG audio frame sync
+        return None
+
+    def sniff_file(self, path: str) -> Optional[str]:
+        """Identify the container of an audio file."""
+        with open(path, 'rb') as f:
+            return self.sniff_format(f.read(16))
+
+    def _stream_in_process(self, path: str) -> Iterator[np.ndarray]:
+        """Read WAV/FLAC with soundfile, downmixing and resampling block by block."""
+        with sf.SoundFile(path) as f:
+            resampler = StreamingResampler(f.samplerate) if f.samplerate != SAMPLE_RATE else None
+            read_frames = max(1, self.block_samples * f.samplerate // SAMPLE_RATE)
+            while True:
+                block = f.read(read_frames, dtype='float32', always_2d=True)
+                final = len(block) < read_frames
+                mono = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+                out = resampler.process(mono, final=final) if resampler else mono
+                if len(out):
+                    yield out
+                if final:
+                    break
+
+    def stream(self, path: str) -> Iterator[np.ndarray]:
+        """
+        Decode a file as a stream of 16 kHz mono float32 blocks.
+
+        Args:
+            path (str): Path to the audio file.
+
+        Yields:
+            np.ndarray: Consecutive blocks of samples.
+        """
+        path = str(path)
+        fmt = self.sniff_file(path)
+        if fmt in self.IN_PROCESS_FORMATS:
+            emitted = False
+            try:
+                # Reading and resampling are CPU-bound; keep them off the eventlet hub
+                for block in NativeThreadRunner.iterate(self._stream_in_process(path)):
+                    emitted = True
+                    yield block
+                return
+            except RuntimeError as e:  # libsndfile errors derive from RuntimeError
+                if emitted:
+                    raise
+                logging.warning(f"In-process decode of {path} failed ({e}); falling back to ffmpeg.")
+        yield from self.ffmpeg.stream(path, self.block_samples, seekable=fmt in self.SEEKABLE_FORMATS)
+
+    def decode(self, path: str) -> np.ndarray:
+        """Decode a whole file to 16 kHz mono float32 samples."""
+        blocks = list(self.stream(path))
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
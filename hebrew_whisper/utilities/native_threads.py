@@ -0,0 +1,45 @@
+from typing import Any, Callable, Iterable, Iterator
+
+try:
+    import eventlet
+    from eventlet import patcher, tpool
+except ImportError:  # eventlet is only needed when serving with async_mode='eventlet'
+    eventlet = None
+
+
+class NativeThreadRunner:
+    """
+    Run blocking, CPU-bound calls without stalling the eventlet hub.
+
+    When `eventlet.monkey_patch()` is active, every thread is a green thread sharing one OS
+    thread, so a long torch call freezes all sockets, heartbeats included. Calls made
+    through this runner execute on eventlet's pool of native OS threads instead and the
+    calling green thread waits cooperatively. Without monkey patching they run inline.
+
+    Only pure computation should go through the runner: green sockets, pipes and locks
+    must not be used from a native thread.
+    """
+
+    _sentinel = object()
+
+    @staticmethod
+    def is_green() -> bool:
+        """True when threads are green threads on the eventlet hub."""
+        return eventlet is not None and patcher.is_monkey_patched('thread')
+
+    @staticmethod
+    def run(fn: Callable, *args, **kwargs) -> Any:
+        """Call `fn(*args, **kwargs)` on a native thread when needed and return its result."""
+        if NativeThreadRunner.is_green():
+            return tpool.execute(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+    @staticmethod
+    def iterate(iterable: Iterable) -> Iterator:
+        """Advance a CPU-bound iterator on a native thread, one item at a time."""
+        iterator = iter(iterable)
+        while True:
+            item = NativeThreadRunner.run(next, iterator, NativeThreadRunner._sentinel)
+            if item is NativeThreadRunner._sentinel:
+                return
+            yield item
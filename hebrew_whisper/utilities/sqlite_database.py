@@ -0,0 +1,39 @@
+import os
+import sqlite3
+import threading
+
+
+class SQLiteDatabase:
+    """
+    Base class for stores kept in an SQLite database file.
+
+    The database is created with the subclass's `SCHEMA` on first use. Each thread gets
+    its own connection in WAL mode, so readers do not block the writer and several
+    processes can share the file.
+    """
+
+    SCHEMA = ""
+    ISOLATION_LEVEL = ""  # sqlite3's default: transactions are opened implicitly
+    ROW_FACTORY = None
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path (str): Path of the SQLite database file.
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._local = threading.local()
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection; SQLite connections are not shared across threads."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=self.ISOLATION_LEVEL)
+            if self.ROW_FACTORY is not None:
+                conn.row_factory = self.ROW_FACTORY
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
@@ -1,22 +1,25 @@
 # C:\Users\Mor\Desktop\NN_Whisper_AI_Flask\hebrew_whisper\utilities\text_normalizer.py
 
 import re
-import soundfile as sf
+import numpy as np
 import whisper
 import unicodedata
-from scipy.signal import butter, lfilter
+from utilities.audio_decoder import SAMPLE_RATE, AudioDecoder
+from utilities.audio_filters import SpectralGate, StreamingFilter, bandpass_sos
 
 class AudioPreprocessor:
-    def __init__(self, model_path='base', training_data_folder=None):
+    def __init__(self, model_path='base', training_data_folder=None, spectral_gate=False):
         """
         Initialize the AudioPreprocessor with model path and training data folder.
         
         Args:
             model_path (str): Path to the Whisper model or model size.
             training_data_folder (str): Path to the folder with training data.
+            spectral_gate (bool): Also apply the spectral-gating denoiser after the band-pass filter.
         """
         self.model_path = model_path
         self.training_data_folder = training_data_folder
+        self.spectral_gate = spectral_gate
         self.model = self.load_model()
 
     def load_model(self):
@@ -32,27 +35,62 @@ class AudioPreprocessor:
         Returns:
             tuple: Processed audio data and sample rate.
         """
-        data, rate = sf.read(audio_path)
-        # Apply noise reduction (optional, based on project needs)
-        data = self.noise_reduction(data, rate)
-        return data, rate
+        blocks = list(self.stream_preprocessed(audio_path))
+        data = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+        return data, SAMPLE_RATE
+
+    def stream_preprocessed(self, audio_path):
+        """
+        Decode and denoise audio block by block, keeping memory independent of file length.
+        
+        Args:
+            audio_path (str): Path to the audio file.
+            
+        Yields:
+            ndarray: Consecutive blocks of processed 16 kHz mono samples.
+        """
+        yield from self.noise_reduction_stream(AudioDecoder.get_instance().stream(audio_path), SAMPLE_RATE)
+
+    def noise_reduction_stream(self, blocks, rate):
+        """
+        Apply noise reduction to a stream of blocks, carrying filter state across them.
+        
+        Args:
+            blocks (Iterable[ndarray]): Blocks shaped (samples,) or (samples, channels).
+            rate (int): Sample rate of the audio data.
+            
+        Yields:
+            ndarray: Noise-reduced blocks.
+        """
+        bandpass = StreamingFilter(bandpass_sos(rate))
+        gate = SpectralGate(rate) if self.spectral_gate else None
+        previous = None
+        for block in blocks:
+            # Hold one block back so the gate knows which block is the last one
+            if previous is not None:
+                filtered = bandpass.process(previous)
+                out = gate.process(filtered) if gate else filtered
+                if len(out):
+                    yield out
+            previous = block
+        if previous is not None:
+            filtered = bandpass.process(previous)
+            out = gate.process(filtered, final=True) if gate else filtered
+            if len(out):
+                yield out
 
     def noise_reduction(self, data, rate):
         """
         Apply a basic noise reduction filter to the audio data.
         
         Args:
-            data (ndarray): Audio data array.
+            data (ndarray): Audio data array, shaped (samples,) or (samples, channels).
             rate (int): Sample rate of the audio data.
             
         Returns:
             ndarray: Noise-reduced audio data.
         """
-        nyquist = 0.5 * rate
-        low = 300 / nyquist  # Low-frequency cut-off for reducing noise
-        high = 3000 / nyquist  # High-frequency cut-off for reducing noise
-        b, a = butter(1, [low, high], btype='band')  # Create bandpass filter
-        return lfilter(b, a, data)
+        return np.concatenate(list(self.noise_reduction_stream([data], rate)) or [data[:0]])
 
 class TextNormalizer:
     @staticmethod
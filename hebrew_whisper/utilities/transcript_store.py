@@ -0,0 +1,156 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Optional
+
+from utilities.sqlite_database import SQLiteDatabase
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class TranscriptStore(SQLiteDatabase):
+    """
+    Indexed transcript store backed by an embedded SQLite database.
+
+    Each record holds the zlib-compressed text and segments of one transcription along
+    with its timing and metadata. Records are keyed by job id and indexed by the SHA-256
+    of the source audio, so repeated uploads of the same file are answered without
+    running the model again.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS transcripts (
+            job_id      TEXT PRIMARY KEY,
+            audio_hash  TEXT NOT NULL,
+            filename    TEXT,
+            language    TEXT NOT NULL,
+            model_name  TEXT NOT NULL,
+            text        BLOB NOT NULL,
+            segments    BLOB NOT NULL,
+            timing      TEXT NOT NULL,
+            metadata    TEXT NOT NULL,
+            created_at  REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_transcripts_audio
+            ON transcripts (audio_hash, language, model_name);
+    """
+
+    @classmethod
+    def get_instance(cls, db_path: str) -> "TranscriptStore":
+        """Return the shared store for `db_path`, opening it on first use."""
+        with cls._instances_lock:
+            store = cls._instances.get(db_path)
+            if store is None:
+                store = cls(db_path)
+                cls._instances[db_path] = store
+            return store
+
+    @classmethod
+    def from_config(cls, config) -> "TranscriptStore":
+        """Return the shared store configured in a Flask config mapping."""
+        db_path = config.get('TRANSCRIPT_DB') or os.path.join(
+            config.get('TRANSCRIPT_FOLDER', './transcripts'), 'transcripts.sqlite3')
+        return cls.get_instance(db_path)
+
+    @staticmethod
+    def hash_audio(file_path: str, chunk_size: int = 1 << 20) -> str:
+        """Compute the SHA-256 of an audio file without reading it into memory at once."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _pack(value) -> bytes:
+        if isinstance(value, str):
+            return zlib.compress(value.encode('utf-8'))
+        return zlib.compress(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+
+    @staticmethod
+    def _unpack_text(blob: bytes) -> str:
+        return zlib.decompress(blob).decode('utf-8')
+
+    @staticmethod
+    def _unpack_json(blob: bytes):
+        return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+    def put(self, audio_hash: str, text: str, segments=None, timing=None, metadata=None,
+            filename=None, language='he', model_name='medium', job_id=None) -> str:
+        """
+        Store a transcription.
+
+        Args:
+            audio_hash (str): SHA-256 of the source audio.
+            text (str): Transcribed text.
+            segments (list): Timed segments, as returned by the model.
+            timing (dict): Timing measurements for the job.
+            metadata (dict): Free-form metadata.
+            filename (str): Original upload name.
+            language (str): Language code used for the transcription.
+            model_name (str): Model variant used for the transcription.
+            job_id (str): Job identifier; generated when omitted.
+
+        Returns:
+            str: The job id of the stored record.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO transcripts "
+                    "(job_id, audio_hash, filename, language, model_name, text, segments, timing, metadata, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, audio_hash, filename, language, model_name,
+                     self._pack(text), self._pack(segments or []),
+                     json.dumps(timing or {}), json.dumps(metadata or {}, ensure_ascii=False), time.time())
+                )
+            return job_id
+        except sqlite3.Error as e:
+            logging.error(f"Failed to store transcript {job_id}: {e}")
+            raise IOError(f"Failed to store transcript {job_id}: {e}")
+
+    def _to_record(self, row) -> Optional[dict]:
+        if row is None:
+            return None
+        job_id, audio_hash, filename, language, model_name, text, segments, timing, metadata, created_at = row
+        return {
+            'job_id': job_id,
+            'audio_hash': audio_hash,
+            'filename': filename,
+            'language': language,
+            'model_name': model_name,
+            'text': self._unpack_text(text),
+            'segments': self._unpack_json(segments),
+            'timing': json.loads(timing),
+            'metadata': json.loads(metadata),
+            'created_at': created_at,
+        }
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return the record for `job_id`, or None if it does not exist."""
+        row = self._connection().execute(
+            "SELECT job_id, audio_hash, filename, language, model_name, text, segments, timing, metadata, created_at "
+            "FROM transcripts WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return self._to_record(row)
+
+    def find_by_audio(self, audio_hash: str, language='he', model_name='medium') -> Optional[dict]:
+        """Return the latest record for the given audio, language and model, or None."""
+        row = self._connection().execute(
+            "SELECT job_id, audio_hash, filename, language, model_name, text, segments, timing, metadata, created_at "
+            "FROM transcripts WHERE audio_hash = ? AND language = ? AND model_name = ? "
+            "ORDER BY created_at DESC LIMIT 1", (audio_hash, language, model_name)
+        ).fetchone()
+        return self._to_record(row)
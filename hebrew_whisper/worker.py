@@ -0,0 +1,55 @@
+import argparse
+import logging
+import signal
+
+from app.config import Config
+from models.model_pool import WhisperModelPool
+from services.inference_worker import InferenceWorker
+from services.job_queue import create_job_queue
+from utilities.transcript_store import TranscriptStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def load_config(config_class=Config) -> dict:
+    """Read the upper-case settings of a config class into a mapping, like Flask does."""
+    return {key: getattr(config_class, key) for key in dir(config_class) if key.isupper()}
+
+
+def run_worker():
+    """
+    Run a standalone inference worker fed by the job queue.
+
+    Start as many workers as the hardware allows next to any number of web processes
+    started with INFERENCE_MODE=queue; all of them must share JOB_QUEUE_URL, the
+    transcript store and the upload folder.
+    """
+    config = load_config()
+    parser = argparse.ArgumentParser(description="Standalone Hebrew Whisper inference worker.")
+    parser.add_argument('--queue-url', default=config['JOB_QUEUE_URL'])
+    parser.add_argument('--concurrency', type=int, default=config['WORKER_CONCURRENCY'])
+    args = parser.parse_args()
+
+    worker = InferenceWorker(
+        queue=create_job_queue(args.queue_url),
+        pool=WhisperModelPool.from_config(config),
+        store=TranscriptStore.from_config(config),
+        model_name=config['MODEL_NAME'],
+        concurrency=args.concurrency,
+        lease_seconds=config['JOB_LEASE_SECONDS'],
+        poll_interval=config['JOB_POLL_INTERVAL_SECONDS'],
+        reaper_interval=config['MEMORY_REAPER_INTERVAL_SECONDS'],
+    )
+
+    def shutdown(signum, frame):
+        logger.info("Shutdown requested; finishing running jobs.")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    worker.run()
+
+
+if __name__ == "__main__":
+    run_worker()